@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Set
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import glob
+import json
 import os
 import sys
+import time
 from pathlib import Path
 import requests
 
@@ -15,23 +20,33 @@ if str(SRC_DIR) not in sys.path:
     sys.path.append(str(SRC_DIR))
 
 # --- proje modülleri ---
-from extract.pdf_reader import pick_first_pdf, read_pdf_lines
+from extract.pdf_reader import pick_first_pdf
+from extract.line_cache import read_pdf_lines_cached, sha1_file, load_lines
+from extract.artifacts import save_stage_artifacts, load_stage_artifacts
 from extract.heading_extractor import load_headings_dict, detect_headings
-from rules.rules_engine import run_rules
-from report.report_writer import save_bundle            # JSON/Excel/MD(+CSV) tek seferde
-from report.commentary_llm import generate_commentary   # Ollama yorumu (tek kaynak)
+from rules.rules_engine import run_rules, run_rules_all_types, load_rule_plan
+from report.report_writer import save_bundle, save_aggregate_excel, attach_commentary  # JSON/Excel/MD(+CSV) tek seferde
+from report.commentary_llm import generate_commentary, generate_commentary_batch, OLLAMA_PARALLEL  # Ollama yorumu (tek kaynak)
+from report.tracing import tracer_from_env
 
 # ------------------------------
 # Ayarlar
 # ------------------------------
 # Taşınmaz türü: "arsa" | "tarla" | "konut" | "bina" | "ticari_tesis" | "sera" | "turistik_tesis" | "akaryakit"
+# "auto": tüm türler tek geçişte denetlenir, başlık/anahtar kelime skoruyla en olası tür seçilir
 ASSET_TYPE = os.getenv("ASSET_TYPE", "arsa")
-REPORT_BASENAME = f"ziraat_raporu_{ASSET_TYPE}"
 
 # LLM kontrolü (aynı terminalde:  $env:ENABLE_LLM="1")
 ENABLE_LLM = os.getenv("ENABLE_LLM", "0").strip().lower() in ("1", "true")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen2.5:7b-instruct-q4_K_M")  # hızlı varsayılan
 
+# Sonuç deposu (SQLite); boş bırakılırsa kapalı. Örn: $env:RESULTS_DB="data/results.sqlite"
+RESULTS_DB = os.getenv("RESULTS_DB", "").strip() or None
+
+# Kural profili (kural başına süre / regex tarama / bayt): $env:PROFILE_RULES="1"
+# tarama/bayt: bölüm taramasına ilk dokunan kurala yazılır; önbellekten okunanlar ayrı sayılır
+PROFILE_RULES = os.getenv("PROFILE_RULES", "0").strip().lower() in ("1", "true")
+
 def _warmup_ollama(model: str) -> None:
     """İlk çağrı gecikmesini azaltmak için 1 token'lık ısınma isteği."""
     if not ENABLE_LLM:
@@ -46,6 +61,262 @@ def _warmup_ollama(model: str) -> None:
         # Sessiz geç; warmup başarısız olsa da akışı bozma
         pass
 
+# ------------------------------
+# Batch modu
+# ------------------------------
+DICT_PATH = "data/rules/headings_dict.yaml"
+RULES_PATH = "data/rules/kurallar.yaml"
+BATCH_INDEX = "batch_index.jsonl"  # out_dir altında; her satır bir dosya sonucu
+# Toplu yorumda bellekte aynı anda tutulan sonuç sayısı
+COMMENTARY_CHUNK = 4 * max(1, OLLAMA_PARALLEL)
+
+def _list_pdfs(spec: str) -> List[Path]:
+    """Klasör → içindeki *.pdf; aksi halde glob deseni (** destekli)."""
+    p = Path(spec)
+    if p.is_dir():
+        return sorted(p.glob("*.pdf"))
+    return sorted(Path(x) for x in glob.glob(spec, recursive=True) if x.lower().endswith(".pdf"))
+
+def _load_index(index_path: Path) -> List[Dict[str, Any]]:
+    """Mevcut batch index'ini okur; yarım kalmış son satırı (çökme) atlar."""
+    if not index_path.exists():
+        return []
+    out = []
+    with index_path.open("r", encoding="utf-8") as f:
+        for ln in f:
+            try:
+                out.append(json.loads(ln))
+            except json.JSONDecodeError:
+                continue
+    return out
+
+def _finish(rec: Dict[str, Any], path: Path, asset_type: str, out_dir: str,
+            result: Dict[str, Any]) -> None:
+    """save_bundle (yorumsuz; yorum _commentary_pass'te); index kaydını sonuçla günceller."""
+    paths = save_bundle(
+        result,
+        rules_path=RULES_PATH,
+        out_dir=out_dir,
+        base_name=f"{path.stem}_{rec['sha1'][:8]}_{asset_type}",
+        include_csv=True,
+        results_db=RESULTS_DB,
+        asset_type=asset_type,
+        doc_hash=rec["sha1"],
+    )
+    rec.update(verdict=result.get("verdict"), summary_counts=result.get("summary_counts"),
+               paths=paths)
+
+def _run_rules_for(lines: List[Dict[str, Any]], heads: List[Dict[str, Any]],
+                   asset_type: str) -> tuple:
+    """(çözümlenen tür, sonuç). asset_type="auto" ise sıralamadaki ilk tür seçilir."""
+    plan = load_rule_plan(RULES_PATH)
+    if asset_type != "auto":
+        return asset_type, run_rules(lines, heads, RULES_PATH, asset_type=asset_type,
+                                     plan=plan, profile=PROFILE_RULES)
+    multi = run_rules_all_types(lines, heads, RULES_PATH, plan=plan)
+    best = multi["best"]
+    result = multi["results"][best]
+    result["asset_ranking"] = multi["ranking"]
+    return best, result
+
+def _process_one(pdf_path: str, asset_type: str, out_dir: str,
+                 sha1: Optional[str] = None) -> Dict[str, Any]:
+    """Tek PDF: okuma → başlık → kural → save_bundle. Index kaydı döner."""
+    t0 = time.perf_counter()
+    path = Path(pdf_path)
+    rec: Dict[str, Any] = {"file": str(path), "asset_type": asset_type}
+    tr = tracer_from_env(str(path))  # her iş kendi izini yazar (TRACE=1)
+    try:
+        with tr:
+            with tr.span("read") as sp:
+                rec["sha1"] = sha1 or sha1_file(path)
+                lines = read_pdf_lines_cached(path, pdf_hash=rec["sha1"])
+                sp["items"] = {"spans": len(lines)}
+            with tr.span("detect") as sp:
+                heads = detect_headings(lines, load_headings_dict(DICT_PATH),
+                                        strict_threshold=0.70, suspect_low=0.50)
+                # yeniden denetim (--recheck) için aşama çıktıları
+                save_stage_artifacts(rec["sha1"], heads,
+                                     meta={"file": str(path), "dict": DICT_PATH,
+                                           "strict": 0.70, "suspect": 0.50})
+                sp["items"] = {"headings": len(heads)}
+            with tr.span("rules") as sp:
+                resolved, result = _run_rules_for(lines, heads, asset_type)
+                sp["items"] = {"findings": len(result.get("findings", []))}
+            if resolved != asset_type:
+                rec.update(asset_type=resolved, requested_type=asset_type,
+                           asset_ranking=[(r["asset_type"], r["score"])
+                                          for r in result["asset_ranking"][:3]])
+            with tr.span("save"):
+                _finish(rec, path, resolved, out_dir, result)
+    except Exception as e:
+        rec["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        trace = tr.dump()
+        if trace:
+            rec["trace"] = trace
+    rec["duration_s"] = round(time.perf_counter() - t0, 3)
+    return rec
+
+def _recheck_one(prev: Dict[str, Any], out_dir: str) -> Dict[str, Any]:
+    """
+    Kayıtlı satır + başlıklardan yalnız run_rules + yazıcıları çalıştırır.
+    Önceki sonuçtaki rule_hashes ile tanımı değişmeyen kurallar taşınır.
+    Aşama çıktısı yoksa tam işleme (_process_one) düşer.
+    """
+    t0 = time.perf_counter()
+    path, asset_type, sha1 = Path(prev["file"]), prev["asset_type"], prev["sha1"]
+    art = load_stage_artifacts(sha1)
+    lines = load_lines(sha1) if art is not None else None
+    if art is None or lines is None:
+        return _process_one(str(path), asset_type, out_dir, sha1)
+
+    rec: Dict[str, Any] = {"file": str(path), "asset_type": asset_type, "sha1": sha1, "recheck": True}
+    try:
+        with open(prev["paths"]["json"], "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        result = run_rules(lines, art["headings"], RULES_PATH, asset_type=asset_type,
+                           plan=load_rule_plan(RULES_PATH), previous=previous,
+                           profile=PROFILE_RULES)
+        rec["reevaluated"] = len(result["reevaluated"])
+        if not result["reevaluated"] and result["rule_hashes"] == previous.get("rule_hashes"):
+            # kural seti aynı: eski çıktılar geçerli
+            rec.update(verdict=result.get("verdict"), summary_counts=result.get("summary_counts"),
+                       paths=prev["paths"], unchanged=True)
+        else:
+            _finish(rec, path, asset_type, out_dir, result)
+    except Exception as e:
+        rec["error"] = f"{type(e).__name__}: {e}"
+    rec["duration_s"] = round(time.perf_counter() - t0, 3)
+    return rec
+
+def _commentary_pass(recs: List[Dict[str, Any]], idx) -> None:
+    """
+    Batch/recheck yorumları: işçiler yorum üretmez; biten raporlar
+    generate_commentary_batch ile sunucunun paralel slotları kadar eşzamanlı
+    istekle yorumlanır. Yorum rapora eklenir (attach_commentary) ve güncel
+    kayıt index'e yeniden yazılır (aynı sha1 + türde sonuncusu geçerlidir).
+    """
+    if not ENABLE_LLM:
+        return
+    todo = [r for r in recs
+            if not r.get("error") and not r.get("unchanged") and (r.get("paths") or {}).get("json")]
+    for i in range(0, len(todo), COMMENTARY_CHUNK):
+        chunk, items = [], []
+        for rec in todo[i:i + COMMENTARY_CHUNK]:
+            try:
+                with open(rec["paths"]["json"], "r", encoding="utf-8") as f:
+                    items.append((rec["asset_type"], json.load(f)))
+                chunk.append(rec)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[UYARI] Sonuç okunamadı ({rec['paths']['json']}): {e}")
+        for rec, out in zip(chunk, generate_commentary_batch(items)):
+            if out.get("error") or not out.get("text"):
+                print(f"[UYARI] Yorum üretilemedi ({Path(rec['file']).name}): {out.get('error', 'boş yanıt')}")
+                continue
+            rec["paths"] = attach_commentary(rec["paths"], out["text"])
+            rec["commentary_cached"] = out["cached"]
+            idx.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            idx.flush()
+        print(f"Yorum: {min(i + COMMENTARY_CHUNK, len(todo))}/{len(todo)}")
+
+def run_batch(spec: str, asset_type: str = ASSET_TYPE, out_dir: str = "report",
+              workers: int = 2, force: bool = False) -> Path:
+    """
+    Klasör/glob içindeki tüm PDF'leri sınırlı süreç havuzuyla işler.
+    Sonuçlar out_dir/batch_index.jsonl'e dosya bitince eklenir; yeniden
+    çalıştırıldığında aynı içerik (sha1) + tür için hatasız kaydı olanlar atlanır.
+    """
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    index_path = Path(out_dir) / BATCH_INDEX
+    done: Set[str] = set()
+    if not force:
+        done = {r["sha1"] for r in _load_index(index_path)
+                if r.get("requested_type", r.get("asset_type")) == asset_type
+                and r.get("sha1") and not r.get("error")}
+
+    _warmup_ollama(OLLAMA_MODEL)
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as ex, \
+            index_path.open("a", encoding="utf-8") as idx:
+        # hash'ler de işçilerde; aynı içerik (önceki çalıştırma ya da bu batch'te
+        # ikinci kopya) tek kez işlenir, önbellekler üzerinde yarış olmaz
+        pdfs = [str(p) for p in _list_pdfs(spec)]
+        first: Dict[str, str] = {}
+        todo: List[tuple] = []
+        for p, sha1 in zip(pdfs, ex.map(sha1_file, pdfs)):
+            if sha1 in done:
+                print(f"[ATLANDI] {p} (daha önce işlendi)")
+            elif sha1 in first:
+                print(f"[ATLANDI] {p} (aynı içerik: {first[sha1]})")
+            else:
+                first[sha1] = p
+                todo.append((p, sha1))
+        print(f"Batch: {len(todo)} dosya işlenecek, {workers} işçi → {index_path}")
+
+        futs = [ex.submit(_process_one, p, asset_type, out_dir, sha1) for p, sha1 in todo]
+        recs: List[Dict[str, Any]] = []
+        for fut in as_completed(futs):
+            rec = fut.result()
+            recs.append(rec)
+            idx.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            idx.flush()  # çökme sonrası devam için her kayıt hemen diske
+            status = rec.get("error") or rec.get("verdict")
+            print(f"- {rec['file']} → {status} ({rec['duration_s']} sn)")
+        _commentary_pass(recs, idx)
+    return index_path
+
+def _latest_records(index_path: Path) -> List[Dict[str, Any]]:
+    """Başarılı kayıtlar; aynı sha1 + tür birden çok kez işlendiyse sonuncusu."""
+    latest: Dict[tuple, Dict[str, Any]] = {}
+    for rec in _load_index(index_path):
+        if rec.get("error") or not (rec.get("paths") or {}).get("json"):
+            continue
+        latest[(rec.get("sha1"), rec.get("asset_type"))] = rec
+    return list(latest.values())
+
+def run_recheck(out_dir: str = "report", workers: int = 2) -> Path:
+    """
+    kurallar.yaml değişikliğinden sonra out_dir'deki tüm batch sonuçlarını
+    PDF okumadan yeniden denetler; yeni kayıtlar index'e eklenir.
+    """
+    index_path = Path(out_dir) / BATCH_INDEX
+    todo = _latest_records(index_path)
+    print(f"Yeniden denetim: {len(todo)} kayıt, {workers} işçi → {index_path}")
+
+    _warmup_ollama(OLLAMA_MODEL)
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as ex, \
+            index_path.open("a", encoding="utf-8") as idx:
+        futs = [ex.submit(_recheck_one, rec, out_dir) for rec in todo]
+        recs: List[Dict[str, Any]] = []
+        for fut in as_completed(futs):
+            rec = fut.result()
+            recs.append(rec)
+            idx.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            idx.flush()
+            status = rec.get("error") or ("değişmedi" if rec.get("unchanged") else rec.get("verdict"))
+            print(f"- {rec['file']} → {status} ({rec['duration_s']} sn)")
+        _commentary_pass(recs, idx)
+    return index_path
+
+def iter_batch_results(index_path: Path):
+    """
+    Batch index'indeki başarılı kayıtlar için (kayıt, result) çiftlerini
+    tek tek üretir. Aynı sha1 + tür birden çok kez işlendiyse sonuncusu alınır.
+    """
+    for rec in _latest_records(index_path):
+        try:
+            with open(rec["paths"]["json"], "r", encoding="utf-8") as f:
+                yield rec, json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[UYARI] Sonuç okunamadı ({rec['paths']['json']}): {e}")
+
+def export_aggregate(out_dir: str, out_path: str) -> Dict[str, int]:
+    """out_dir/batch_index.jsonl → tek (akışlı) Excel çalışma kitabı."""
+    stats = save_aggregate_excel(iter_batch_results(Path(out_dir) / BATCH_INDEX),
+                                 rules_path=RULES_PATH, out_path=out_path)
+    print(f"Toplu Excel: {stats['documents']} rapor, {stats['rows']} bulgu → {out_path}")
+    return stats
+
 def main() -> None:
     print(f"ASSET_TYPE={ASSET_TYPE} | ENABLE_LLM={ENABLE_LLM} | OLLAMA_MODEL={OLLAMA_MODEL}")
 
@@ -55,69 +326,124 @@ def main() -> None:
     # 1) PDF'i seç ve satırları oku
     pdf_path = pick_first_pdf("data/pdfs")
     print(f"Seçilen PDF: {pdf_path}")
-    lines = read_pdf_lines(pdf_path)
-
-    # 2) Sözlük ve kural dosyaları
-    dict_path = "data/rules/headings_dict.yaml"
-    rules_path = "data/rules/kurallar.yaml"
-
-    for pth, msg in [(dict_path, "Başlık sözlüğü yok"), (rules_path, "Kural dosyası yok")]:
-        if not Path(pth).exists():
-            raise FileNotFoundError(f"{msg}: {Path(pth).resolve()}")
-
-    # 3) Başlıkları tespit et
-    hdict = load_headings_dict(dict_path)
-    heads = detect_headings(lines, hdict, strict_threshold=0.70, suspect_low=0.50)
-
-    print(f"\nTaşınmaz türü: {ASSET_TYPE}")
-    print(f"Bulunan başlık/suspect sayısı: {len(heads)}")
-    for h in heads[:30]:
-        print(f"[p{h['page']}] {h['status'].upper()} "
-              f"score={h['score']} canon={h['canonical'] or '-'}  →  {h['text']}")
-
-    # 4) Kuralları çalıştır
-    print("\n— KURAL MOTORU —")
-    result = run_rules(lines, heads, rules_path, asset_type=ASSET_TYPE)
-
-    print("VERDICT:", result.get("verdict"))
-    print("ÖZET:", result.get("summary_counts"))
-    for f in result.get("findings", [])[:20]:
-        title = f.get("title", "")
-        detail = f.get("detail", "")
-        extra = f" — {detail}" if detail else ""
-        print(f"- {f.get('rule_id')} → {f.get('status')} ({title}){extra}")
-
-    # 5) (Opsiyonel) Ollama ile doğal dil yorumu
-    commentary_text = ""
-    if ENABLE_LLM:
-        print("\n— YORUM (Ollama) —")
-        try:
-            # imza: generate_commentary(asset_type, result)
-            commentary_text = generate_commentary(ASSET_TYPE, result)
-            print(commentary_text or "(boş yanıt)")
-        except Exception as e:
-            print(f"[UYARI] Yorum üretilemedi: {type(e).__name__}: {e}")
-    else:
-        print("\n— YORUM (Ollama) — atlandı (ENABLE_LLM=0)")
-
-    # 6) Çıktıları tek timestamp ile kaydet
-    out_dir = "report"
-    paths = save_bundle(
-        result,
-        rules_path=rules_path,
-        out_dir=out_dir,
-        base_name=REPORT_BASENAME,
-        commentary_text=commentary_text or None,
-        include_csv=True,
-    )
+
+    # aşama izleme: TRACE=1 (ayrıca TRACE_PROFILE=1 / TRACE_MEMORY=1)
+    tr = tracer_from_env(str(pdf_path))
+    try:
+        with tr:
+            with tr.span("read") as sp:
+                pdf_hash = sha1_file(pdf_path)
+                lines = read_pdf_lines_cached(pdf_path, pdf_hash=pdf_hash)  # içerik hash'i ile önbellekli
+                sp["items"] = {"spans": len(lines)}
+
+            # 2) Sözlük ve kural dosyaları
+            dict_path = DICT_PATH
+            rules_path = RULES_PATH
+
+            for pth, msg in [(dict_path, "Başlık sözlüğü yok"), (rules_path, "Kural dosyası yok")]:
+                if not Path(pth).exists():
+                    raise FileNotFoundError(f"{msg}: {Path(pth).resolve()}")
+
+            # 3) Başlıkları tespit et
+            with tr.span("detect") as sp:
+                hdict = load_headings_dict(dict_path)
+                heads = detect_headings(lines, hdict, strict_threshold=0.70, suspect_low=0.50)
+                sp["items"] = {"headings": len(heads)}
+
+            print(f"Bulunan başlık/suspect sayısı: {len(heads)}")
+            for h in heads[:30]:
+                print(f"[p{h['page']}] {h['status'].upper()} "
+                      f"score={h['score']} canon={h['canonical'] or '-'}  →  {h['text']}")
+
+            # 4) Kuralları çalıştır
+            print("\n— KURAL MOTORU —")
+            with tr.span("rules") as sp:
+                asset_type, result = _run_rules_for(lines, heads, ASSET_TYPE)
+                sp["items"] = {"findings": len(result.get("findings", []))}
+
+            print(f"\nTaşınmaz türü: {asset_type}" + (" (otomatik)" if asset_type != ASSET_TYPE else ""))
+            for r in result.get("asset_ranking", [])[:5]:
+                print(f"  {r['asset_type']:<16} skor={r['score']:<6} kural={r['rule_present_ratio']:<6} "
+                      f"başlık={','.join(r['heading_hits']) or '-'}  kelime={len(r['keyword_hits'])}")
+
+            print("VERDICT:", result.get("verdict"))
+            print("ÖZET:", result.get("summary_counts"))
+            for f in result.get("findings", [])[:20]:
+                title = f.get("title", "")
+                detail = f.get("detail", "")
+                extra = f" — {detail}" if detail else ""
+                print(f"- {f.get('rule_id')} → {f.get('status')} ({title}){extra}")
+
+            if result.get("profile"):
+                prof = result["profile"]
+                print(f"\nPROFİL: toplam {prof['total_ms']} ms (bölümleme {prof['sectioning_ms']} ms)")
+                for r in prof["by_rule"][:10]:
+                    print(f"  {r['rule_id']:<16} {r['type']:<18} {r['wall_ms']:>8} ms  "
+                          f"tarama={r['scans']}  bayt={r['bytes']}  "
+                          f"önbellekten={r['cached_scans']} ({r['cached_bytes']} bayt)")
+
+            # 5) (Opsiyonel) Ollama ile doğal dil yorumu
+            commentary_text = ""
+            if ENABLE_LLM:
+                print("\n— YORUM (Ollama) —")
+                with tr.span("commentary"):
+                    try:
+                        # imza: generate_commentary(asset_type, result)
+                        commentary_text = generate_commentary(asset_type, result)
+                        print(commentary_text or "(boş yanıt)")
+                    except Exception as e:
+                        print(f"[UYARI] Yorum üretilemedi: {type(e).__name__}: {e}")
+            else:
+                print("\n— YORUM (Ollama) — atlandı (ENABLE_LLM=0)")
+
+            # 6) Çıktıları tek timestamp ile kaydet
+            out_dir = "report"
+            with tr.span("save") as sp:
+                paths = save_bundle(
+                    result,
+                    rules_path=rules_path,
+                    out_dir=out_dir,
+                    base_name=f"ziraat_raporu_{asset_type}",
+                    commentary_text=commentary_text or None,
+                    include_csv=True,
+                    results_db=RESULTS_DB,
+                    asset_type=asset_type,
+                    doc_hash=pdf_hash,
+                )
+                sp["items"] = {"files": len(paths)}
+    finally:
+        # hata olsa da iz yazılır: en çok başarısız çalıştırmalarda gerekir
+        trace = tr.dump()
 
     print("\nDosyalar hazır:")
-    for k, v in paths.items():
+    for k, v in {**paths, **{f"trace_{k}": v for k, v in trace.items()}}.items():
         print(f"- {k.upper():<12}: {v}")
 
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Ziraat rapor denetleyici")
+    ap.add_argument("--batch", metavar="KLASÖR|GLOB",
+                    help="Tüm PDF'leri toplu işle (ör. data/pdfs veya 'arsiv/**/*.pdf')")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Batch işçi sayısı")
+    ap.add_argument("--out-dir", default="report", help="Çıktı klasörü")
+    ap.add_argument("--force", action="store_true", help="İşlenmiş dosyaları da yeniden işle")
+    ap.add_argument("--recheck", action="store_true",
+                    help="out-dir'deki sonuçları kayıtlı aşama çıktılarıyla yeniden denetle (PDF okunmaz)")
+    ap.add_argument("--aggregate-xlsx", metavar="DOSYA",
+                    help="out-dir'deki batch sonuçlarını tek Excel'e topla (ör. report/2025_05.xlsx)")
+    return ap.parse_args(argv)
+
 if __name__ == "__main__":
+    args = _parse_args()
     try:
-        main()
+        if args.batch:
+            run_batch(args.batch, ASSET_TYPE, out_dir=args.out_dir,
+                      workers=args.workers, force=args.force)
+        if args.recheck:
+            run_recheck(args.out_dir, workers=args.workers)
+        if args.aggregate_xlsx:
+            export_aggregate(args.out_dir, args.aggregate_xlsx)
+        if not (args.batch or args.recheck or args.aggregate_xlsx):
+            main()
     except Exception as e:
         print(f"[HATA] {type(e).__name__}: {e}")
         raise
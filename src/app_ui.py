@@ -1,25 +1,24 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, List, Tuple, Optional, Iterator
 import os
 from pathlib import Path
-import hashlib
-import shutil
 import gradio as gr
 
 # Proje modülleri
-from extract.pdf_reader import read_pdf_lines
+from extract.line_cache import read_pdf_lines_cached
+from extract.pdf_store import ingest_pdf
 from extract.heading_extractor import load_headings_dict, detect_headings
 from rules.rules_engine import run_rules
-from report.commentary_llm import generate_commentary
+from report.commentary_llm import stream_commentary
 from report.pdf_highlight import build_annotated_pdf  # yalnız sorunlu metinleri boyar
+from report.tracing import tracer_from_env
 
 # -------------------------------------------------------------------
 # Yol/ayarlar
 # -------------------------------------------------------------------
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
-PDF_DIR = DATA_DIR / "pdfs"
 RULES_DIR = DATA_DIR / "rules"
 DICT_PATH = RULES_DIR / "headings_dict.yaml"
 RULES_PATH = RULES_DIR / "kurallar.yaml"
@@ -72,13 +71,6 @@ def _ollama_models() -> List[str]:
 def _strip_model(label: str) -> str:
     return (label or "").split("·", 1)[0].strip()
 
-def _sha1_file(path: Path) -> str:
-    h = hashlib.sha1()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1 << 20), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
 def _cache_paths(pdf_hash: str, asset_type: str, model: Optional[str]) -> Tuple[Path, Path]:
     tag = model or "no-llm"
     cmt = REPORT_DIR / f"{CACHE_VERSION}_comment_{pdf_hash}_{asset_type}_{tag}.txt"
@@ -97,22 +89,38 @@ def pipeline(
     model_override: str,       # Textbox (elle model adı)
     use_cache: bool,           # Önbellek kullanılsın mı?
     progress: gr.Progress = gr.Progress(track_tqdm=True),
-) -> Tuple[str, str | None]:
+) -> Iterator[Tuple[str, str | None]]:
+    """Generator: yorum metni üretildikçe (metin, None), sonunda (metin, pdf) verir."""
 
     if not pdf_file:
-        return "Lütfen PDF yükleyin.", None
+        yield "Lütfen PDF yükleyin.", None
+        return
     if not asset_type:
-        return "Lütfen taşınmaz türünü seçin.", None
+        yield "Lütfen taşınmaz türünü seçin.", None
+        return
 
     in_path = Path(pdf_file.name)
     if in_path.suffix.lower() != ".pdf":
-        return "Yüklenen dosya PDF değil. Lütfen .pdf yükleyin.", None
+        yield "Yüklenen dosya PDF değil. Lütfen .pdf yükleyin.", None
+        return
 
+    # aşama izleme: TRACE=1 (ayrıca TRACE_PROFILE=1 / TRACE_MEMORY=1)
+    tr = tracer_from_env(in_path.name)
+    try:
+        with tr:
+            yield from _pipeline_stages(tr, in_path, asset_type, profile_name, enable_llm,
+                                        model_choice_label, model_override, use_cache, progress)
+    finally:
+        tr.dump()
+
+def _pipeline_stages(tr, in_path: Path, asset_type: str, profile_name: str, enable_llm: bool,
+                     model_choice_label: str, model_override: str, use_cache: bool,
+                     progress) -> Iterator[Tuple[str, str | None]]:
     progress(0.02, desc="Dosya hazırlanıyor…")
-    target = PDF_DIR / in_path.name
-    target.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copyfile(in_path, target)
-    pdf_hash = _sha1_file(target)
+    with tr.span("ingest") as sp:
+        # tek geçiş: kopyalarken hash'lenir; aynı içerik depoda bir kez durur
+        pdf_hash, target, created = ingest_pdf(in_path)
+        sp["items"] = {"new_upload": int(created)}
 
     model_to_use = ""
     if enable_llm:
@@ -126,23 +134,30 @@ def pipeline(
     cmt_path, ann_pdf_path = _cache_paths(pdf_hash, asset_type, model_to_use if enable_llm else None)
     if use_cache and cmt_path.exists() and ann_pdf_path.exists():
         progress(0.10, desc="Önbellekten getiriliyor…")
-        return cmt_path.read_text(encoding="utf-8"), str(ann_pdf_path)
+        yield cmt_path.read_text(encoding="utf-8"), str(ann_pdf_path)
+        return
 
     progress(0.20, desc="PDF okunuyor…")
-    lines = read_pdf_lines(target)
+    with tr.span("read") as sp:
+        lines = read_pdf_lines_cached(target, pdf_hash=pdf_hash)
+        sp["items"] = {"spans": len(lines)}
 
     progress(0.40, desc="Başlıklar tespit ediliyor…")
-    hdict = load_headings_dict(str(DICT_PATH))
-    t_cfg = PROFILE_THRESHOLDS.get(profile_name, {"strict": 0.70, "suspect": 0.50})
-    heads = detect_headings(
-        lines,
-        hdict,
-        strict_threshold=float(t_cfg["strict"]),
-        suspect_low=float(t_cfg["suspect"]),
-    )
+    with tr.span("detect") as sp:
+        hdict = load_headings_dict(str(DICT_PATH))
+        t_cfg = PROFILE_THRESHOLDS.get(profile_name, {"strict": 0.70, "suspect": 0.50})
+        heads = detect_headings(
+            lines,
+            hdict,
+            strict_threshold=float(t_cfg["strict"]),
+            suspect_low=float(t_cfg["suspect"]),
+        )
+        sp["items"] = {"headings": len(heads)}
 
     progress(0.60, desc="Kurallar çalıştırılıyor…")
-    result = run_rules(lines, heads, str(RULES_PATH), asset_type=asset_type)
+    with tr.span("rules") as sp:
+        result = run_rules(lines, heads, str(RULES_PATH), asset_type=asset_type)
+        sp["items"] = {"findings": len(result.get("findings", []))}
 
     commentary = ""
     if enable_llm:
@@ -152,7 +167,12 @@ def pipeline(
         try:
             os.environ["OLLAMA_MODEL"] = model_to_use
             os.environ["ENABLE_LLM"] = "1"
-            commentary = generate_commentary(asset_type, result) or ""
+            # parçalar geldikçe "Yorum" kutusuna bas
+            with tr.span("commentary"):
+                for piece in stream_commentary(asset_type, result):
+                    commentary += piece
+                    yield commentary, None
+            commentary = commentary.strip()
         finally:
             os.environ["OLLAMA_MODEL"] = prev_model
             os.environ["ENABLE_LLM"] = prev_llm
@@ -160,12 +180,13 @@ def pipeline(
         commentary = "LLM yorumu devre dışı."
 
     progress(0.88, desc="PDF üzeri vurgular ekleniyor…")
-    ann_pdf_path_str = build_annotated_pdf(
-        original_pdf=str(target),
-        lines=lines,
-        findings=result.get("findings", []) or [],
-        output_pdf=str(ann_pdf_path),
-    )
+    with tr.span("highlight"):
+        ann_pdf_path_str = build_annotated_pdf(
+            original_pdf=str(target),
+            lines=lines,
+            findings=result.get("findings", []) or [],
+            output_pdf=str(ann_pdf_path),
+        )
 
     try:
         cmt_path.write_text(commentary or "", encoding="utf-8")
@@ -173,7 +194,7 @@ def pipeline(
         pass
 
     progress(1.0, desc="Hazır.")
-    return (commentary or "Yorum üretilmedi."), ann_pdf_path_str
+    yield (commentary or "Yorum üretilmedi."), ann_pdf_path_str
 
 # -------------------------------------------------------------------
 # UI
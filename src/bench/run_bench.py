@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Aşama benchmark'ı: sentetik raporlar üzerinde read_pdf_lines,
+detect_headings, run_rules, build_annotated_pdf ve save_bundle süreleri.
+
+    python src/bench/run_bench.py --pages 10,100,500 --save-baseline
+    python src/bench/run_bench.py --pages 10,100,500          # baseline ile karşılaştır
+
+Her ölçüm --repeat kez alınır, medyanı kullanılır. Baseline'a göre
+--threshold (oran) VE --min-ms (mutlak) sınırını birlikte aşan aşama
+gerileme sayılır; en az bir gerileme varsa çıkış kodu 1'dir.
+Baseline makineye özeldir; donanım değişince yeniden kaydedin. Baseline
+(data/bench/) ve sentetik PDF'ler (data/cache/bench/) git dışıdır.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Optional
+from pathlib import Path
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+if str(SRC_DIR) not in sys.path:
+    sys.path.append(str(SRC_DIR))
+
+import fitz  # PyMuPDF
+
+from bench.synth_report import generate_report
+from extract.pdf_reader import read_pdf_lines
+from extract.heading_extractor import load_headings_dict, detect_headings
+from rules.rules_engine import run_rules, load_rule_plan
+from report.pdf_highlight import build_annotated_pdf
+from report.report_writer import save_bundle
+
+BASE_DIR = SRC_DIR.parent
+DICT_PATH = BASE_DIR / "data" / "rules" / "headings_dict.yaml"
+RULES_PATH = BASE_DIR / "data" / "rules" / "kurallar.yaml"
+BENCH_DIR = BASE_DIR / "data" / "bench"
+SYNTH_DIR = BASE_DIR / "data" / "cache" / "bench"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+STAGES = ["read_pdf_lines", "detect_headings", "run_rules", "build_annotated_pdf", "save_bundle"]
+
+def _timed(fn: Callable[[], Any], repeat: int) -> tuple:
+    """fn'i repeat kez çalıştırır; (medyan ms, son dönüş değeri)."""
+    times, out = [], None
+    for _ in range(max(1, repeat)):
+        with contextlib.redirect_stdout(io.StringIO()):  # okuyucunun bilgi çıktıları
+            t0 = time.perf_counter()
+            out = fn()
+            times.append((time.perf_counter() - t0) * 1000)
+    return round(statistics.median(times), 3), out
+
+def bench_document(pages: int, seed: int = 0, repeat: int = 3) -> Dict[str, float]:
+    """Tek sayfa sayısı için aşama süreleri (ms)."""
+    pdf = SYNTH_DIR / f"synth_{pages}p_s{seed}.pdf"
+    if not pdf.exists():
+        generate_report(pdf, pages=pages, seed=seed)
+
+    hdict = load_headings_dict(str(DICT_PATH))
+    plan = load_rule_plan(str(RULES_PATH))
+    res: Dict[str, float] = {}
+
+    res["read_pdf_lines"], lines = _timed(lambda: read_pdf_lines(pdf), repeat)
+    res["detect_headings"], heads = _timed(
+        lambda: detect_headings(lines, hdict, strict_threshold=0.70, suspect_low=0.50), repeat)
+    res["run_rules"], result = _timed(
+        lambda: run_rules(lines, heads, str(RULES_PATH), asset_type="arsa", plan=plan), repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        res["build_annotated_pdf"], _ = _timed(
+            lambda: build_annotated_pdf(str(pdf), lines, result["findings"],
+                                        str(Path(tmp) / "annotated.pdf")), repeat)
+        res["save_bundle"], _ = _timed(
+            lambda: save_bundle(result, rules_path=str(RULES_PATH), out_dir=tmp,
+                                base_name=f"bench_{pages}", include_csv=True), repeat)
+    return res
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float, min_ms: float) -> List[Dict[str, Any]]:
+    """Baseline'da da olan her (sayfa, aşama) için oran; gerilemeler işaretli."""
+    rows = []
+    for pages, stages in current.items():
+        for stage, ms in stages.items():
+            base = (baseline.get(pages) or {}).get(stage)
+            if base is None:
+                continue
+            ratio = ms / base if base > 0 else float("inf")
+            rows.append({"pages": pages, "stage": stage, "baseline_ms": base, "ms": ms,
+                         "ratio": round(ratio, 3),
+                         "regressed": ratio > 1 + threshold and ms - base > min_ms})
+    return rows
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Aşama benchmark'ı (sentetik raporlar)")
+    ap.add_argument("--pages", default="10,100", help="Virgülle sayfa sayıları (ör. 10,100,1000)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--baseline", default=str(BASELINE_PATH))
+    ap.add_argument("--save-baseline", action="store_true", help="Sonuçları baseline olarak yaz")
+    ap.add_argument("--threshold", type=float, default=0.25, help="İzin verilen yavaşlama oranı")
+    ap.add_argument("--min-ms", type=float, default=5.0, help="Gürültü için mutlak alt sınır (ms)")
+    args = ap.parse_args(argv)
+    fitz.TOOLS.mupdf_display_warnings(False)  # vurgu anotasyonu uyarıları ölçüm çıktısını boğmasın
+
+    current: Dict[str, Dict[str, float]] = {}
+    for p in [int(x) for x in args.pages.split(",") if x.strip()]:
+        print(f"[{p} sayfa] ölçülüyor…")
+        current[str(p)] = bench_document(p, seed=args.seed, repeat=args.repeat)
+        for stage in STAGES:
+            print(f"  {stage:<20} {current[str(p)][stage]:>10.1f} ms")
+
+    base_path = Path(args.baseline)
+    if args.save_baseline:
+        base_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "meta": {"created": datetime.now().isoformat(timespec="seconds"),
+                     "python": platform.python_version(), "machine": platform.machine(),
+                     "platform": platform.platform(), "seed": args.seed, "repeat": args.repeat},
+            "results": current,
+        }
+        base_path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Baseline kaydedildi: {base_path}")
+        return 0
+
+    if not base_path.exists():
+        print(f"Baseline yok ({base_path}); önce --save-baseline ile kaydedin.")
+        return 0
+    baseline = json.loads(base_path.read_text(encoding="utf-8")).get("results", {})
+    rows = compare(current, baseline, args.threshold, args.min_ms)
+    bad = [r for r in rows if r["regressed"]]
+    print("\nBaseline karşılaştırması:")
+    for r in rows:
+        mark = "GERİLEME" if r["regressed"] else "ok"
+        print(f"  {r['pages']:>5}p {r['stage']:<20} {r['baseline_ms']:>10.1f} → {r['ms']:>10.1f} ms "
+              f"(x{r['ratio']})  {mark}")
+    if bad:
+        print(f"\n{len(bad)} aşama eşik (+%{int(args.threshold * 100)}) üzerinde yavaşladı.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
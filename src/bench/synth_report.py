@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Sentetik Türkçe ekspertiz raporu üretici (PyMuPDF).
+
+Gerçek raporlar paylaşılamadığı için benchmark'lar bu PDF'leri kullanır:
+headings_dict.yaml'daki başlıklar (kalın, büyük punto), tapu/takyidat
+tablosu, emsal satırları, talep/keşif/rapor tarihleri ve dolgu paragrafları.
+Aynı tohum (seed) aynı PDF'i üretir.
+
+    python src/bench/synth_report.py out.pdf --pages 200 --seed 1
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+import argparse
+import random
+import textwrap
+import sys
+
+import fitz  # PyMuPDF
+import yaml
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+DICT_PATH = BASE_DIR / "data" / "rules" / "headings_dict.yaml"
+
+PAGE_W, PAGE_H = 595, 842          # A4 (pt)
+MARGIN = 56
+BODY_SIZE, HEAD_SIZE = 10, 13
+LINE_H = 14
+WRAP = 95                          # satır başına karakter (gövde)
+
+_TR_UPPER = str.maketrans({"i": "İ", "ı": "I"})
+
+IL_ILCE = [("Ankara", "Çankaya"), ("İzmir", "Bornova"), ("Konya", "Selçuklu"),
+           ("Bursa", "Nilüfer"), ("Antalya", "Muratpaşa"), ("Eskişehir", "Odunpazarı")]
+ISIMLER = ["Ahmet Yılmaz", "Ayşe Kaya", "Mehmet Demir", "Fatma Şahin", "Mustafa Çelik",
+           "Zeynep Öztürk", "Hüseyin Aydın", "Elif Arslan"]
+ALACAKLILAR = ["Ziraat Bankası A.Ş.", "Halk Bankası A.Ş.", "Vakıflar Bankası T.A.O.",
+               "Maliye Hazinesi", "İcra Müdürlüğü"]
+TAKYIDAT = ["İpotek", "Haciz", "Şerh", "İrtifak Hakkı", "Beyan"]
+DOLGU = [
+    "Taşınmaz, bölgenin gelişme aksında yer almakta olup ulaşım imkânları yeterlidir.",
+    "Yerinde yapılan incelemede parselin düz bir topoğrafyaya sahip olduğu görülmüştür.",
+    "Çevrede benzer nitelikli taşınmazların yoğun olarak bulunduğu tespit edilmiştir.",
+    "Belediye kayıtları ile tapu kayıtları arasında herhangi bir uyumsuzluk görülmemiştir.",
+    "Değerleme tarihi itibarıyla piyasa koşulları dikkate alınarak analiz yapılmıştır.",
+    "Taşınmazın altyapı hizmetlerinden (elektrik, su, kanalizasyon) faydalandığı görülmüştür.",
+    "Parsel üzerinde ruhsatsız herhangi bir yapılaşmaya rastlanmamıştır.",
+    "Bölgede son dönemde gerçekleşen satışlar ve ilanlar incelenerek emsal seçimi yapılmıştır.",
+]
+
+def _tr_upper(s: str) -> str:
+    return s.translate(_TR_UPPER).upper()
+
+def _date(rnd: random.Random) -> str:
+    return f"{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.{rnd.randint(2019, 2025)}"
+
+def _money(rnd: random.Random) -> str:
+    return f"{rnd.randint(50, 5000) * 1000:,} TL".replace(",", ".")
+
+class _Writer:
+    """Satır satır yazar; sayfa dolunca yenisini açar, hedef sayfada durur."""
+
+    def __init__(self, doc: fitz.Document, pages: int):
+        self.doc = doc
+        self.pages = pages
+        self.regular = fitz.Font("helv")
+        self.bold = fitz.Font("hebo")
+        self.page: Optional[fitz.Page] = None
+        self.tw: Optional[fitz.TextWriter] = None
+        self.y = PAGE_H  # ilk yazımda sayfa açılır
+        self.full = False
+
+    def _flush(self) -> None:
+        if self.tw is not None and self.page is not None:
+            self.tw.write_text(self.page)
+        self.tw = None
+
+    def _need(self, h: float) -> bool:
+        if self.y + h <= PAGE_H - MARGIN:
+            return True
+        if self.doc.page_count >= self.pages:
+            self.full = True
+            return False
+        self._flush()
+        self.page = self.doc.new_page(width=PAGE_W, height=PAGE_H)
+        self.tw = fitz.TextWriter(self.page.rect)
+        self.y = MARGIN
+        return True
+
+    def heading(self, text: str) -> None:
+        if self._need(LINE_H * 3):
+            self.y += LINE_H * 0.8
+            self.tw.append((MARGIN, self.y), text, font=self.bold, fontsize=HEAD_SIZE)
+            self.y += LINE_H * 1.4
+
+    def line(self, text: str) -> None:
+        if self._need(LINE_H):
+            self.tw.append((MARGIN, self.y), text, font=self.regular, fontsize=BODY_SIZE)
+            self.y += LINE_H
+
+    def row(self, cells: List[str], widths: List[int], bold: bool = False) -> None:
+        """Tablo satırı: her hücre ayrı konumda (ayrı span)."""
+        if self._need(LINE_H):
+            x = MARGIN
+            for c, w in zip(cells, widths):
+                self.tw.append((x, self.y), c, font=self.bold if bold else self.regular,
+                               fontsize=BODY_SIZE - 1)
+                x += w
+            self.y += LINE_H
+
+    def paragraph(self, text: str) -> None:
+        for ln in textwrap.wrap(text, WRAP):
+            self.line(ln)
+
+    def close(self) -> None:
+        self._flush()
+
+def _body(canon: str, rnd: random.Random, w: _Writer) -> None:
+    il, ilce = rnd.choice(IL_ILCE)
+    if canon == "kimlik":
+        w.line(f"Ada: {rnd.randint(100, 9999)}   Parsel: {rnd.randint(1, 300)}   "
+               f"Malik: {rnd.choice(ISIMLER)}   Hisse: 1/1")
+        w.line(f"Adres: {il} İli, {ilce} İlçesi, {rnd.choice(['Cumhuriyet', 'Yeni', 'Fatih'])} Mahallesi")
+        w.line(f"RaporNo: {rnd.randint(2020, 2025)}-{rnd.randint(1000, 9999)}   "
+               f"TalepNo: {rnd.randint(10000, 99999)}")
+    elif canon == "konum":
+        w.line(f"Koordinat: {rnd.uniform(36, 42):.5f}, {rnd.uniform(26, 44):.5f}   "
+               f"UAVT: {rnd.randint(10**9, 10**10 - 1)}   Pafta: {rnd.choice('ABCDEFG')}{rnd.randint(1, 40)}")
+    elif canon == "tapu":
+        widths = [90, 80, 80, 170, 90]
+        w.row(["Tür", "Tarih", "Yevmiye No", "Alacaklı", "Tutar"], widths, bold=True)
+        for _ in range(rnd.randint(2, 8)):
+            w.row([rnd.choice(TAKYIDAT), _date(rnd), str(rnd.randint(1000, 99999)),
+                   rnd.choice(ALACAKLILAR), _money(rnd)], widths)
+    elif canon == "imar":
+        w.line(f"KAKS: {rnd.uniform(0.3, 2.5):.2f}   TAKS: {rnd.uniform(0.2, 0.6):.2f}   "
+               f"Hmax: {rnd.uniform(6.5, 30.5):.2f} m   Çekme mesafeleri: 5 m")
+    elif canon == "emsal":
+        widths = [55, 120, 55, 45, 75, 75, 70]
+        w.row(["Emsal", "Adres", "Mesafe", "m2", "BirimDeger", "Duzeltmeler", "Kaynak"], widths, bold=True)
+        for k in range(rnd.randint(3, 6)):
+            w.row([f"Emsal {k + 1}", f"{ilce} / {il}", f"{rnd.randint(100, 3000)} m",
+                   str(rnd.randint(200, 20000)), _money(rnd), f"%{rnd.randint(-20, 20)}",
+                   rnd.choice(["sahibinden", "emlakjet", "belediye"])], widths)
+    elif canon == "yontem":
+        w.line(f"Talep tarihi: {_date(rnd)}   Keşif tarihi: {_date(rnd)}   Rapor tarihi: {_date(rnd)}")
+    elif canon == "nihai":
+        w.line(f"Nihai değer: {_money(rnd)}   Sigorta değeri: {_money(rnd)}")
+    w.paragraph(" ".join(rnd.sample(DOLGU, rnd.randint(2, 5))))
+
+def generate_report(out_path: str | Path, pages: int = 20, seed: int = 0,
+                    headings_path: str | Path = DICT_PATH) -> Path:
+    """pages sayfalık sentetik rapor yazar (10–1000 önerilir); yolu döner."""
+    if pages < 1:
+        raise ValueError("pages en az 1 olmalı")
+    with open(headings_path, "r", encoding="utf-8") as f:
+        hdict: Dict[str, List[str]] = yaml.safe_load(f) or {}
+    sections: List[Tuple[str, List[str]]] = [(k, v) for k, v in hdict.items() if v]
+    rnd = random.Random(seed)
+
+    doc = fitz.open()
+    w = _Writer(doc, pages)
+    k = 0
+    while not w.full:
+        canon, variants = sections[k % len(sections)]
+        k += 1
+        w.heading(_tr_upper(variants[0]))
+        _body(canon, rnd, w)
+    w.close()
+
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    doc.save(str(out), garbage=3, deflate=True)
+    doc.close()
+    return out
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Sentetik ekspertiz raporu (PDF) üret")
+    ap.add_argument("out", help="Çıktı PDF yolu")
+    ap.add_argument("--pages", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    path = generate_report(args.out, pages=args.pages, seed=args.seed)
+    print(f"{path} ({args.pages} sayfa)")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import gzip
+import json
+import os
+
+# Doküman başına aşama çıktısı (tespit edilen başlıklar). Satırlar
+# line_cache'te aynı sha1 ile tutulur; ikisi birlikte kural yeniden
+# denetimini PDF okuma/başlık tespiti olmadan mümkün kılar. Bölüm metinleri
+# saklanmaz: run_rules kanıt (bbox) için bölümleri satırlardan zaten kurar.
+ARTIFACT_VERSION = "stages_v2"
+ARTIFACT_DIR = Path(os.getenv(
+    "ARTIFACT_DIR",
+    str(Path(__file__).resolve().parents[2] / "data" / "cache" / "artifacts"),
+))
+
+def _artifact_path(pdf_hash: str, cache_dir: Optional[Path] = None) -> Path:
+    return Path(cache_dir or ARTIFACT_DIR) / f"{ARTIFACT_VERSION}_{pdf_hash}.json.gz"
+
+def save_stage_artifacts(pdf_hash: str,
+                         headings: List[Dict[str, Any]],
+                         meta: Optional[Dict[str, Any]] = None,
+                         cache_dir: Optional[Path] = None) -> Path:
+    """Başlıkları atomik olarak (geçici dosya + os.replace) yazar."""
+    path = _artifact_path(pdf_hash, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "version": ARTIFACT_VERSION,
+        "sha1": pdf_hash,
+        "meta": meta or {},
+        "headings": headings,
+    }
+    tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=3) as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return path
+
+def load_stage_artifacts(pdf_hash: str, cache_dir: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """{'headings', 'meta'} ya da (yoksa/bozuksa/sürüm farklıysa) None."""
+    path = _artifact_path(pdf_hash, cache_dir)
+    if not path.exists():
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, EOFError, ValueError):
+        return None
+    if payload.get("version") != ARTIFACT_VERSION:
+        return None
+    return payload
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 from typing import List, Dict, Any, Tuple, Optional
+from functools import lru_cache
 import re
 import numpy as np
 import yaml
 
+from rules.trie import trie_regex
+
 NUM_PATTERN = re.compile(r"^\s*\d+(\.\d+)*\s+")
 WS = re.compile(r"\s+")
 
@@ -15,22 +18,63 @@ def _is_bold(font_name: Optional[str], flags: Optional[int]) -> bool:
     # flags sahada değişken; 0 dışı bir değer genelde vurgulu span demek
     return bool(flags and flags > 0)
 
-def _keyword_match_score(text_lc: str, headings_dict: Dict[str, List[str]]) -> Tuple[str, float]:
-    best_key = ""
-    best = 0.0
-    for key, variants in headings_dict.items():
-        hit = 0
-        for v in variants:
-            v = v.lower()
-            if v in text_lc:
-                hit += 1
-        if hit > 0:
-            # kısa varyantlar için aşırı şişmeyi engelle
-            score = min(1.0, 0.35 + 0.15 * hit)
-            if score > best:
-                best = score
-                best_key = key
-    return best_key, best
+class VariantAutomaton:
+    """
+    headings_dict varyantlarının önceden küçük harfe çevrilmiş, tek
+    trie-regex'te birleştirilmiş hali. Tüm doküman metni tek geçişte taranır;
+    her satır için anahtar başına isabet eden varyant sayısı (varyantın satırda
+    alt dize olarak geçip geçmediği) matris olarak döner.
+    """
+
+    def __init__(self, items: Tuple[Tuple[str, Tuple[str, ...]], ...]):
+        self.keys = [k for k, _ in items]
+        variants = sorted({v.lower() for _, vs in items for v in vs})
+        self.vid = {v: i for i, v in enumerate(variants)}
+        # owners[varyant, anahtar] = varyantın o anahtarda kaç kez listelendiği
+        self.owners = np.zeros((len(variants), len(self.keys)), dtype=np.int32)
+        for ki, (_, vs) in enumerate(items):
+            for v in vs:
+                self.owners[self.vid[v.lower()], ki] += 1
+        vs = [v for v in variants if v]
+        # lookahead: her konumda en uzun varyant; içindeki kısa varyantlar _nested'dan
+        self._rx = re.compile("(?=(" + trie_regex(vs) + "))") if vs else None
+        self._nested = {u: [self.vid[u]] + [self.vid[t] for t in vs if t != u and t in u] for u in vs}
+        self._empty = self.vid.get("")
+
+    def hit_matrix(self, texts_lc: List[str]) -> np.ndarray:
+        """(satır × anahtar) isabet sayıları."""
+        hits = np.zeros((len(texts_lc), len(self.keys)), dtype=np.int32)
+        if not texts_lc:
+            return hits
+        if self._empty is not None:  # boş varyant her metinde "geçer"
+            hits += self.owners[self._empty]
+        if self._rx is None:
+            return hits
+        # satırları metinde geçemeyecek bir ayraçla birleştir, ofset → satır eşlemesi
+        starts = np.cumsum([0] + [len(t) + 1 for t in texts_lc[:-1]])
+        blob = "\x00".join(texts_lc)
+        pos: List[int] = []
+        vids: List[int] = []
+        nested = self._nested
+        for m in self._rx.finditer(blob):
+            ids = nested[m.group(1)]
+            pos.extend([m.start()] * len(ids))
+            vids.extend(ids)
+        if not vids:
+            return hits
+        rows = np.searchsorted(starts, np.array(pos), side="right") - 1
+        # satır başına her varyant bir kez sayılır
+        pairs = np.unique(rows * len(self.vid) + np.array(vids))
+        np.add.at(hits, pairs // len(self.vid), self.owners[pairs % len(self.vid)])
+        return hits
+
+@lru_cache(maxsize=8)
+def _automaton(items: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> VariantAutomaton:
+    return VariantAutomaton(items)
+
+def build_automaton(headings_dict: Dict[str, List[str]]) -> VariantAutomaton:
+    """Sözlük içeriğine göre önbellekli otomat (aynı sözlük tekrar derlenmez)."""
+    return _automaton(tuple((k, tuple(v)) for k, v in headings_dict.items()))
 
 def load_headings_dict(yaml_path: str) -> Dict[str, List[str]]:
     with open(yaml_path, "r", encoding="utf-8") as f:
@@ -57,47 +101,67 @@ def detect_headings(lines: List[Dict[str, Any]],
     p90 = float(np.percentile(sizes, 90))
     denom = max(1e-3, (p90 - med))
 
-    results: List[Dict[str, Any]] = []
-    for row in lines:
+    # aday satırlar: boş olmayan, aşırı uzun paragraf olmayan
+    idx: List[int] = []
+    texts: List[str] = []
+    for i, row in enumerate(lines):
         text = (row.get("text") or "").strip()
-        if not text:
-            continue
-        # aşırı uzun paragrafları başlık dışı say
-        if len(text) > 140:
-            continue
-
-        text_lc = text.lower()
-        size = float(row.get("size", 0.0) or 0.0)
-        size_norm = max(0.0, min(1.0, (size - med) / denom))
-        bold = 1.0 if _is_bold(row.get("font"), row.get("flags")) else 0.0
-        is_numbered = 1.0 if NUM_PATTERN.search(text) else 0.0
-        canon_key, kw_score = _keyword_match_score(text_lc, headings_dict)
-
-        # skor karışımı (heuristic)
-        score = (
-            0.35 * size_norm +
-            0.25 * bold +
-            0.25 * is_numbered +
-            0.25 * kw_score
-        )
-
-        status = "other"
-        if score >= strict_threshold:
-            status = "heading"
-        elif score >= suspect_low:
-            status = "suspect"
+        if text and len(text) <= 140:
+            idx.append(i)
+            texts.append(text)
+    if not idx:
+        return []
+    ix = np.array(idx)
+    texts_lc = [t.lower() for t in texts]
+
+    # özellikler: tüm aday satırlar için tek seferde
+    size = sizes[ix]
+    size_norm = np.clip((size - med) / denom, 0.0, 1.0)
+    bold_of: Dict[Tuple[Optional[str], Optional[int]], bool] = {}
+    bold = np.empty(len(idx), dtype=float)
+    for j, i in enumerate(idx):
+        key = (lines[i].get("font"), lines[i].get("flags"))
+        b = bold_of.get(key)
+        if b is None:
+            b = bold_of[key] = _is_bold(*key)
+        bold[j] = 1.0 if b else 0.0
+    is_numbered = np.array([1.0 if NUM_PATTERN.search(t) else 0.0 for t in texts])
+
+    # anahtar skoru: min(1, 0.35 + 0.15 * isabet); eşitlikte ilk anahtar kazanır
+    auto = build_automaton(headings_dict)
+    hits = auto.hit_matrix(texts_lc)
+    if hits.shape[1]:
+        kw_all = np.where(hits > 0, np.minimum(1.0, 0.35 + 0.15 * hits), 0.0)
+        best = kw_all.argmax(axis=1)
+        kw_score = kw_all[np.arange(len(idx)), best]
+    else:
+        best = np.zeros(len(idx), dtype=int)
+        kw_score = np.zeros(len(idx))
 
+    # skor karışımı (heuristic)
+    score = (
+        0.35 * size_norm +
+        0.25 * bold +
+        0.25 * is_numbered +
+        0.25 * kw_score
+    )
+
+    results: List[Dict[str, Any]] = []
+    keep = np.flatnonzero((score >= strict_threshold) | (score >= suspect_low))
+    for j in keep:
+        row = lines[idx[j]]
+        sc = float(score[j])
         results.append({
             "page": row.get("page"),
-            "text": text,
+            "line": idx[j],  # lines içindeki kaynak index
+            "text": texts[j],
             "font": row.get("font"),
-            "size": size,
-            "score": round(float(score), 3),
-            "status": status,
-            "canonical": canon_key or None,
+            "size": float(size[j]),
+            "score": round(sc, 3),
+            "status": "heading" if sc >= strict_threshold else "suspect",
+            "canonical": auto.keys[best[j]] if kw_score[j] > 0 else None,
         })
 
     # yalnızca başlık/suspect olanları, yüksek skor önce
-    results = [r for r in results if r["status"] in ("heading", "suspect")]
     results.sort(key=lambda r: (r["page"], -r["score"]))
     return results
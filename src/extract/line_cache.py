@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Union
+from pathlib import Path
+import gzip
+import hashlib
+import json
+import os
+
+from extract.pdf_reader import read_pdf_lines
+
+# Kayıt yapısı/çıkarım bayrakları değişince artırın: eski önbellek kullanılmaz
+EXTRACTOR_VERSION = "spans_v1"
+LINE_CACHE_DIR = Path(os.getenv(
+    "LINE_CACHE_DIR",
+    str(Path(__file__).resolve().parents[2] / "data" / "cache" / "lines"),
+))
+
+_FIELDS = ("page", "text", "font", "size", "flags", "bbox")
+
+def sha1_file(path: Union[str, Path]) -> str:
+    h = hashlib.sha1()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _cache_path(pdf_hash: str, cache_dir: Optional[Path] = None) -> Path:
+    return Path(cache_dir or LINE_CACHE_DIR) / f"{EXTRACTOR_VERSION}_{pdf_hash}.json.gz"
+
+def save_lines(lines: List[Dict[str, Any]], pdf_hash: str,
+               cache_dir: Optional[Path] = None) -> Path:
+    """
+    Span kayıtlarını sütun bazlı (font adları tekilleştirilmiş) gzip JSON
+    olarak yazar. Yazım geçici dosya + os.replace ile atomiktir.
+    """
+    path = _cache_path(pdf_hash, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fonts: List[Optional[str]] = []
+    font_ix: Dict[Optional[str], int] = {}
+    cols: Dict[str, List[Any]] = {k: [] for k in _FIELDS}
+    for r in lines:
+        fn = r.get("font")
+        if fn not in font_ix:
+            font_ix[fn] = len(fonts)
+            fonts.append(fn)
+        cols["page"].append(r.get("page"))
+        cols["text"].append(r.get("text"))
+        cols["font"].append(font_ix[fn])
+        cols["size"].append(r.get("size"))
+        cols["flags"].append(r.get("flags"))
+        bb = r.get("bbox")
+        cols["bbox"].append(list(bb) if bb is not None else None)
+    payload = {"version": EXTRACTOR_VERSION, "n": len(lines), "fonts": fonts, "cols": cols}
+    tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=3) as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return path
+
+def load_lines(pdf_hash: str, cache_dir: Optional[Path] = None) -> Optional[List[Dict[str, Any]]]:
+    """Önbellekte varsa span kayıtlarını döner; yoksa/bozuksa None."""
+    path = _cache_path(pdf_hash, cache_dir)
+    if not path.exists():
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != EXTRACTOR_VERSION:
+            return None
+        fonts = payload["fonts"]
+        c = payload["cols"]
+        return [
+            {
+                "page": c["page"][i],
+                "text": c["text"][i],
+                "font": fonts[c["font"][i]],
+                "size": c["size"][i],
+                "flags": c["flags"][i],
+                "bbox": tuple(c["bbox"][i]) if c["bbox"][i] is not None else None,
+            }
+            for i in range(payload["n"])
+        ]
+    except (OSError, EOFError, ValueError, KeyError, IndexError):
+        return None
+
+def read_pdf_lines_cached(pdf_path: Union[str, Path], pdf_hash: Optional[str] = None,
+                          cache_dir: Optional[Path] = None,
+                          workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    read_pdf_lines'ın içerik hash'i + EXTRACTOR_VERSION anahtarlı önbellekli hali.
+    Aynı PDF farklı tür/profil ile yeniden denetlenirken PyMuPDF hiç çalışmaz.
+    """
+    pdf_hash = pdf_hash or sha1_file(pdf_path)
+    lines = load_lines(pdf_hash, cache_dir)
+    if lines is not None:
+        return lines
+    lines = read_pdf_lines(Path(pdf_path), workers=workers)
+    try:
+        save_lines(lines, pdf_hash, cache_dir)
+    except OSError as e:
+        print(f"[UYARI] Satır önbelleği yazılamadı: {e}")
+    return lines
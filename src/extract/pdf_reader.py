@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
 from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import mmap
+import os
 import sys
 
 try:
@@ -20,34 +25,126 @@ def pick_first_pdf(dir_path: str) -> Path:
     return pdfs[0]
 
 
-def read_pdf_lines(pdf_path: Path):
+# Paralel çıkarım: işçi sayısı (PDF_WORKERS) ve bunun altında seri kalınacak sayfa sayısı
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "1") or 1)
+PARALLEL_MIN_PAGES = 40
+
+# "dict" çıkarımının varsayılan bayrakları, görsel blokları (PRESERVE_IMAGES) hariç:
+# taranmış eklerde görsel verisi hiç çözülmez.
+TEXT_ONLY_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+@contextmanager
+def open_pdf_mapped(pdf_path: Union[str, Path]) -> Iterator[Any]:
+    """
+    PDF'i bellek eşlemli (mmap) tampondan açar: MuPDF baytları doğrudan
+    sayfa önbelleğinden okur, Python tarafında kopya oluşmaz. Belge
+    kapanmadan eşleme bırakılmaz. Boş dosyada PyMuPDF'in kendi hatası için
+    yol ile açmaya düşer.
+    """
+    with open(pdf_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            with fitz.open(pdf_path) as doc:  # type: ignore[attr-defined]
+                yield doc
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    try:
+        doc = fitz.open(stream=view, filetype="pdf")  # type: ignore[attr-defined]
+        try:
+            yield doc
+        finally:
+            doc.close()
+    finally:
+        view.release()
+        mm.close()
+
+
+def _page_indices(page_count: int, pages: Optional[Iterable[int]]) -> List[int]:
+    """1-tabanlı sayfa numaralarını geçerli 0-tabanlı index listesine çevirir."""
+    if pages is None:
+        return list(range(page_count))
+    return [p - 1 for p in pages if 1 <= p <= page_count]
+
+
+def _page_spans(page, page_no: int) -> Iterator[Dict[str, Any]]:
+    """Tek sayfadaki boş olmayan span kayıtları."""
+    blocks = page.get_text("dict", flags=TEXT_ONLY_FLAGS)["blocks"]
+    for b in blocks:
+        if "lines" in b:
+            for l in b["lines"]:
+                for s in l["spans"]:
+                    txt = (s.get("text") or "").strip()
+                    if not txt:
+                        continue
+                    yield {
+                        "page": page_no,
+                        "text": txt,
+                        "font": s.get("font"),
+                        "size": s.get("size"),
+                        "flags": s.get("flags"),
+                        "bbox": s.get("bbox"),
+                    }
+
+
+def _doc_spans(doc, indices: List[int]) -> Iterator[Dict[str, Any]]:
+    for i in indices:
+        yield from _page_spans(doc.load_page(i), i + 1)
+
+
+def iter_pdf_lines(pdf_path: Union[str, Path],
+                   pages: Optional[Iterable[int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Span kayıtlarını sayfa sayfa üretir (read_pdf_lines ile aynı kayıt yapısı).
+    pages: 1-tabanlı sayfa numaraları (ör. range(1, 11)); None → tüm sayfalar.
+    """
+    pdf_path = Path(pdf_path)
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"PDF bulunamadı: {pdf_path}")
+
+    with open_pdf_mapped(pdf_path) as doc:
+        yield from _doc_spans(doc, _page_indices(doc.page_count, pages))
+
+
+def _extract_chunk(job: Tuple[str, List[int]]) -> List[Dict[str, Any]]:
+    """İşçi süreç: belgeyi kendisi açar, verilen sayfa index'lerini okur."""
+    path, indices = job
+    with open_pdf_mapped(path) as doc:
+        return list(_doc_spans(doc, indices))
+
+
+def _chunks(indices: List[int], n: int) -> List[List[int]]:
+    """Sırayı koruyarak ~eşit boyutlu ardışık parçalara böler."""
+    size = max(1, -(-len(indices) // n))
+    return [indices[k:k + size] for k in range(0, len(indices), size)]
+
+
+def read_pdf_lines(pdf_path: Path, pages: Optional[Iterable[int]] = None,
+                   workers: Optional[int] = None):
+    """
+    Tüm span kayıtlarını liste olarak döner.
+    workers > 1 ve sayfa sayısı PARALLEL_MIN_PAGES üstündeyse sayfalar
+    süreç havuzuna bölünür; sonuç sayfa sırasıyla birleştirilir.
+    """
+    pdf_path = Path(pdf_path)
     print("Çalışma dizini:", Path.cwd())
     print("Açılacak PDF:", pdf_path.resolve())
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF bulunamadı: {pdf_path}")
 
-    doc = fitz.open(pdf_path)  # type: ignore[attr-defined]
-    print("Sayfa sayısı:", doc.page_count)
-
-    results = []
-    for i in range(doc.page_count):
-        page = doc.load_page(i)
-        blocks = page.get_text("dict")["blocks"]
-        for b in blocks:
-            if "lines" in b:
-                for l in b["lines"]:
-                    for s in l["spans"]:
-                        txt = (s.get("text") or "").strip()
-                        if not txt:
-                            continue
-                        results.append({
-                            "page": i + 1,
-                            "text": txt,
-                            "font": s.get("font"),
-                            "size": s.get("size"),
-                            "flags": s.get("flags"),
-                            "bbox": s.get("bbox"),
-                        })
+    workers = PDF_WORKERS if workers is None else workers
+    with open_pdf_mapped(pdf_path) as doc:
+        print("Sayfa sayısı:", doc.page_count)
+        indices = _page_indices(doc.page_count, pages)
+        if workers <= 1 or len(indices) < PARALLEL_MIN_PAGES:
+            return list(_doc_spans(doc, indices))
+
+    # her işçiye birkaç parça: yük dengesi için
+    jobs = [(str(pdf_path), c) for c in _chunks(indices, workers * 2)]
+    results: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for part in ex.map(_extract_chunk, jobs):  # map sırayı korur
+            results.extend(part)
     return results
 
 
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from typing import Tuple, Union
+from datetime import datetime
+from pathlib import Path
+import hashlib
+import json
+import os
+
+# İçerik adresli PDF deposu: her yükleme <sha1>.pdf olarak bir kez saklanır.
+# Aynı içerik farklı adla gelirse tekrar yazılmaz; aynı adlı farklı dosyalar
+# birbirini ezmez. Özgün adlar uploads.jsonl'de tutulur.
+PDF_STORE_DIR = Path(os.getenv(
+    "PDF_STORE_DIR",
+    str(Path(__file__).resolve().parents[2] / "data" / "pdfs" / "store"),
+))
+_CHUNK = 1 << 20
+
+def _store_path(pdf_hash: str, store_dir: Path) -> Path:
+    return store_dir / pdf_hash[:2] / f"{pdf_hash}.pdf"
+
+def ingest_pdf(src: Union[str, Path], store_dir: Union[str, Path, None] = None) -> Tuple[str, Path, bool]:
+    """
+    Dosyayı tek geçişte hem hash'ler hem depoya kopyalar: baytlar bir kez
+    okunur, geçici dosyaya yazılırken sha1 güncellenir. İçerik zaten
+    depodaysa geçici dosya silinir. Dönüş: (sha1, depo yolu, yeni_mi).
+    """
+    store = Path(store_dir or PDF_STORE_DIR)
+    store.mkdir(parents=True, exist_ok=True)
+    h = hashlib.sha1()
+    size = 0
+    tmp = store / f".upload.{os.getpid()}.{id(h):x}.tmp"
+    buf = bytearray(_CHUNK)
+    view = memoryview(buf)
+    try:
+        with Path(src).open("rb") as fin, tmp.open("wb") as fout:
+            while True:
+                n = fin.readinto(buf)
+                if not n:
+                    break
+                h.update(view[:n])
+                fout.write(view[:n])
+                size += n
+        pdf_hash = h.hexdigest()
+        target = _store_path(pdf_hash, store)
+        created = not target.exists()
+        if created:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, target)
+    finally:
+        view.release()
+        if tmp.exists():
+            tmp.unlink()
+
+    with (store / "uploads.jsonl").open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"sha1": pdf_hash, "name": Path(src).name, "size": size, "new": created,
+                            "ts": datetime.now().isoformat(timespec="seconds")},
+                           ensure_ascii=False) + "\n")
+    return pdf_hash, target, created
@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-from typing import Dict, Any, List
-import os, json, socket, requests
+from typing import Dict, Any, List, Iterator, Optional, Tuple
+import os, json, socket, threading, time, requests
+from urllib.parse import urlsplit, urlunsplit
+from concurrent.futures import ThreadPoolExecutor
+
+from report.llm_cache import RESPONSE_CACHE, llm_cache_enabled
 
 HTTP_URL  = "http://127.0.0.1:11434/api/generate"
 HTTP_TAGS = "http://127.0.0.1:11434/api/tags"
@@ -40,15 +44,115 @@ def _http_tags_ok() -> bool:
     except Exception:
         return False
 
-def _model_list() -> List[str]:
+def _tags_url(url: str) -> str:
+    """Üretim uç noktasıyla (…/api/generate) aynı sunucunun /api/tags adresi."""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, "/api/tags", "", ""))
+
+def _model_list(tags_url: str = HTTP_TAGS) -> List[str]:
     try:
-        r = SESSION.get(HTTP_TAGS, timeout=2.5)
+        r = SESSION.get(tags_url, timeout=2.5)
         r.raise_for_status()
         data = r.json() or {}
         return [m.get("name") or m.get("model") for m in (data.get("models") or []) if m]
     except Exception:
         return []
 
+# Sağlık durumu önbelleği ve devre kesici ayarları
+HEALTH_TTL = float(os.getenv("OLLAMA_HEALTH_TTL", "60"))      # sn: model listesi/canlılık geçerliliği
+BREAKER_THRESHOLD = int(os.getenv("OLLAMA_BREAKER_FAILS", "3"))  # art arda hata → devre açılır
+BREAKER_BACKOFF = 5.0     # sn: ilk bekleme, her yeniden açılışta ikiye katlanır
+BREAKER_BACKOFF_MAX = 300.0
+# yarı açık deneme sonucu bildirilmeden (ör. akış yarıda bırakıldı) bu süre geçerse yeni deneme
+BREAKER_TRIAL_TIMEOUT = HTTP_TIMEOUT * 2
+
+class OllamaHealth:
+    """
+    Süreç genelinde paylaşılan Ollama istemci durumu.
+    - Model listesi ve canlılık sonucu HEALTH_TTL boyunca önbellekte tutulur.
+    - Art arda BREAKER_THRESHOLD hatadan sonra devre açılır; açıkken LLM
+      çağrıları hemen atlanır. Süre dolunca yalnız bir çağıran deneme yapar
+      (yarı açık), diğerleri sonuç gelene kadar atlanır; deneme başarısızsa
+      bekleme iki katına çıkar, başarılıysa devre kapanır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[str, Tuple[List[str], float]] = {}  # tags url → (liste, zaman)
+        self._alive: Optional[bool] = None
+        self._alive_at = 0.0
+        self.failures = 0
+        self.open_until = 0.0
+        self.backoff = BREAKER_BACKOFF
+        self._trial_at = 0.0  # yarı açık denemenin başladığı an (0: deneme yok)
+
+    def models(self, tags_url: str = HTTP_TAGS) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            hit = self._models.get(tags_url)
+            if hit is not None and now - hit[1] < HEALTH_TTL:
+                return hit[0]
+        models = _model_list(tags_url)
+        with self._lock:
+            self._models[tags_url] = (models, now)
+            if models and tags_url == HTTP_TAGS:  # liste geldiyse varsayılan sunucu ayakta
+                self._alive, self._alive_at = True, now
+        return models
+
+    def alive(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self._alive is not None and now - self._alive_at < HEALTH_TTL:
+                return self._alive
+        ok = _ollama_http_alive() or _http_tags_ok()
+        with self._lock:
+            self._alive, self._alive_at = ok, now
+        return ok
+
+    def allow(self) -> bool:
+        """Devre kapalıysa True; bekleme dolduysa yalnız ilk çağırana (deneme) True."""
+        now = time.monotonic()
+        with self._lock:
+            if not self.open_until:
+                return True
+            if now < self.open_until:
+                return False
+            if self._trial_at and now - self._trial_at < BREAKER_TRIAL_TIMEOUT:
+                return False  # deneme sürüyor
+            self._trial_at = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.open_until = 0.0
+            self.backoff = BREAKER_BACKOFF
+            self._trial_at = 0.0
+            self._alive, self._alive_at = True, time.monotonic()
+
+    def record_failure(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.failures += 1
+            self._trial_at = 0.0
+            self._alive, self._alive_at = None, 0.0  # sonraki denemede yeniden yokla
+            if self.failures >= BREAKER_THRESHOLD:
+                # yarı açık denemesi de başarısızsa bekleme katlanır
+                if self.open_until:
+                    self.backoff = min(self.backoff * 2, BREAKER_BACKOFF_MAX)
+                self.open_until = now + self.backoff
+                print(f"[YORUM] Ollama devre kesici açık: {self.backoff:.0f} sn LLM çağrısı atlanacak.")
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            left = max(0.0, self.open_until - time.monotonic())
+            return {"failures": self.failures, "open": left > 0, "retry_in_s": round(left, 1),
+                    "trial_in_flight": bool(self._trial_at),
+                    "backoff_s": self.backoff,
+                    "models": list(self._models.get(HTTP_TAGS, ([], 0.0))[0])}
+
+HEALTH = OllamaHealth()
+
 def _pick_model() -> str:
     m = os.getenv("OLLAMA_MODEL", "").strip()
     return m or "qwen2.5:7b-instruct-q4_K_M"
@@ -78,18 +182,37 @@ def _call_ollama_python(prompt: str, model: str) -> str:
     resp = ollama.generate(model=model, prompt=prompt, stream=False, options=OL_OPTIONS)
     return (resp.get("response") or "").strip()
 
-def _call_ollama_http(prompt: str, model: str) -> str:
+def _call_ollama_http(prompt: str, model: str, session: Optional[requests.Session] = None,
+                      url: str = HTTP_URL) -> str:
     payload = {"model": model, "prompt": prompt, "stream": False, "options": OL_OPTIONS}
-    r = SESSION.post(HTTP_URL, json=payload, timeout=HTTP_TIMEOUT)
+    r = (session or SESSION).post(url, json=payload, timeout=HTTP_TIMEOUT)
     r.raise_for_status()
     data = r.json() or {}
     return (data.get("response") or "").strip()
 
-def generate_commentary(asset_type: str, result: Dict[str, Any]) -> str:
-    if not _llm_enabled():
-        print("— YORUM (Ollama) — devre dışı")
-        return ""
+def _stream_ollama_python(prompt: str, model: str) -> Iterator[str]:
+    import ollama  # type: ignore
+    for chunk in ollama.generate(model=model, prompt=prompt, stream=True, options=OL_OPTIONS):
+        piece = chunk.get("response") or ""
+        if piece:
+            yield piece
+
+def _stream_ollama_http(prompt: str, model: str) -> Iterator[str]:
+    payload = {"model": model, "prompt": prompt, "stream": True, "options": OL_OPTIONS}
+    with SESSION.post(HTTP_URL, json=payload, timeout=HTTP_TIMEOUT, stream=True) as r:
+        r.raise_for_status()
+        for ln in r.iter_lines():
+            if not ln:
+                continue
+            data = json.loads(ln)
+            piece = data.get("response") or ""
+            if piece:
+                yield piece
+            if data.get("done"):
+                break
 
+def _prepare(asset_type: str, result: Dict[str, Any]) -> Tuple[str, str]:
+    """Model adı ve prompt."""
     model = _pick_model()
     prompt = _build_prompt(
         asset_type,
@@ -97,23 +220,160 @@ def generate_commentary(asset_type: str, result: Dict[str, Any]) -> str:
         result.get("summary_counts",{}) or {},
         result.get("findings",[]) or [],
     )
+    return model, prompt
 
+def _warn_missing_model(model: str, url: str = HTTP_URL) -> None:
     # model yüklü değilse uyar ama yine dene
-    avail = _model_list()
+    avail = HEALTH.models(_tags_url(url))
     if avail and model not in avail:
         print(f"[YORUM] Model bulunamadı: {model}. Yüklü: {avail}")
 
+def stream_commentary(asset_type: str, result: Dict[str, Any]) -> Iterator[str]:
+    """
+    generate_commentary'nin akışlı hali: Ollama ürettikçe metin parçalarını verir.
+    SDK ilk parçadan önce hata verirse HTTP yoluna geçilir.
+    """
+    if not _llm_enabled():
+        print("— YORUM (Ollama) — devre dışı")
+        return
+
+    model, prompt = _prepare(asset_type, result)
+    key = RESPONSE_CACHE.key(prompt, model, OL_OPTIONS)
+    cached = RESPONSE_CACHE.get(key) if llm_cache_enabled() else None
+    if cached is not None:
+        yield cached
+        return
+    if not HEALTH.allow():
+        print("— YORUM atlandı (Ollama devre kesici açık).")
+        return
+    _warn_missing_model(model)
+
+    parts: List[str] = []
     if _ollama_python_available():
         try:
-            return _call_ollama_python(prompt, model)
+            for piece in _stream_ollama_python(prompt, model):
+                parts.append(piece)
+                yield piece
+            HEALTH.record_success()
+            _cache_put(key, "".join(parts), model)
+            return
         except Exception as e:
             print(f"[YORUM] SDK hata: {type(e).__name__}: {e}")
+            if parts:
+                HEALTH.record_failure()
+                return
 
-    if _ollama_http_alive() or _http_tags_ok():
+    if HEALTH.alive():
         try:
-            return _call_ollama_http(prompt, model)
+            for piece in _stream_ollama_http(prompt, model):
+                parts.append(piece)
+                yield piece
+            HEALTH.record_success()
+            _cache_put(key, "".join(parts), model)
+            return
         except Exception as e:
             print(f"[YORUM] HTTP hata: {type(e).__name__}: {e}")
 
+    HEALTH.record_failure()
+    print("— YORUM üretilemedi.")
+
+def _cache_put(key: str, text: str, model: str) -> None:
+    """Tamamlanmış yanıtı önbelleğe yazar; disk hatası akışı bozmaz."""
+    if not llm_cache_enabled():
+        return
+    try:
+        RESPONSE_CACHE.put(key, text.strip(), model)
+    except OSError as e:
+        print(f"[YORUM] Önbellek yazılamadı: {e}")
+
+def cache_stats() -> Dict[str, int]:
+    """Yanıt önbelleği isabet/ıska/atım sayaçları."""
+    return RESPONSE_CACHE.stats()
+
+def generate_commentary(asset_type: str, result: Dict[str, Any]) -> str:
+    if not _llm_enabled():
+        print("— YORUM (Ollama) — devre dışı")
+        return ""
+
+    model, prompt = _prepare(asset_type, result)
+    key = RESPONSE_CACHE.key(prompt, model, OL_OPTIONS)
+    cached = RESPONSE_CACHE.get(key) if llm_cache_enabled() else None
+    if cached is not None:
+        return cached
+    if not HEALTH.allow():
+        print("— YORUM atlandı (Ollama devre kesici açık).")
+        return ""
+    _warn_missing_model(model)
+
+    if _ollama_python_available():
+        try:
+            text = _call_ollama_python(prompt, model)
+            HEALTH.record_success()
+            _cache_put(key, text, model)
+            return text
+        except Exception as e:
+            print(f"[YORUM] SDK hata: {type(e).__name__}: {e}")
+
+    if HEALTH.alive():
+        try:
+            text = _call_ollama_http(prompt, model)
+            HEALTH.record_success()
+            _cache_put(key, text, model)
+            return text
+        except Exception as e:
+            print(f"[YORUM] HTTP hata: {type(e).__name__}: {e}")
+
+    HEALTH.record_failure()
     print("— YORUM üretilemedi.")
     return ""
+
+# ---------- Toplu yorum (sınırlı eşzamanlılık) ----------
+# Sunucudaki paralel slot sayısı (Ollama: OLLAMA_NUM_PARALLEL); varsayılan eşzamanlılık
+OLLAMA_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "2") or 2)
+
+_TLS = threading.local()
+
+def _thread_session() -> requests.Session:
+    """requests.Session iş parçacıkları arasında paylaşılmaz; her işçiye bir tane."""
+    sess = getattr(_TLS, "session", None)
+    if sess is None:
+        sess = _TLS.session = requests.Session()
+    return sess
+
+def _one_commentary(asset_type: str, result: Dict[str, Any], url: str) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    model, prompt = _prepare(asset_type, result)
+    key = RESPONSE_CACHE.key(prompt, model, OL_OPTIONS)
+    rec: Dict[str, Any] = {"asset_type": asset_type, "model": model, "text": "", "cached": False}
+    cached = RESPONSE_CACHE.get(key) if llm_cache_enabled() else None
+    if cached is not None:
+        rec.update(text=cached, cached=True)
+    elif not HEALTH.allow():
+        rec["error"] = "devre kesici açık"
+    else:
+        try:
+            rec["text"] = _call_ollama_http(prompt, model, session=_thread_session(), url=url)
+            HEALTH.record_success()
+            _cache_put(key, rec["text"], model)
+        except Exception as e:
+            HEALTH.record_failure()
+            rec["error"] = f"{type(e).__name__}: {e}"
+    rec["latency_s"] = round(time.perf_counter() - t0, 3)
+    return rec
+
+def generate_commentary_batch(items: List[Tuple[str, Dict[str, Any]]],
+                              concurrency: Optional[int] = None,
+                              url: str = HTTP_URL) -> List[Dict[str, Any]]:
+    """
+    Çok sayıda (asset_type, result) için yorumu HTTP uç noktasına en fazla
+    `concurrency` (varsayılan OLLAMA_PARALLEL) eşzamanlı istekle üretir.
+    Sonuçlar giriş sırasıyla döner: text, latency_s, cached, (varsa) error.
+    """
+    if not _llm_enabled():
+        print("— YORUM (Ollama) — devre dışı")
+        return [{"asset_type": a, "text": "", "cached": False, "latency_s": 0.0} for a, _ in items]
+    if items:
+        _warn_missing_model(_pick_model(), url)
+    workers = max(1, concurrency or OLLAMA_PARALLEL)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(lambda it: _one_commentary(it[0], it[1], url), items))
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from typing import Any, Dict, Optional
+from pathlib import Path
+import hashlib
+import json
+import os
+import threading
+import time
+
+# Ayarlar (ortam değişkeniyle ezilebilir)
+LLM_CACHE_DIR = Path(os.getenv(
+    "LLM_CACHE_DIR",
+    str(Path(__file__).resolve().parents[2] / "data" / "cache" / "llm"),
+))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))   # sn
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "64"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+# Adet/boyut sayaçları yazımlarda güncellenir; klasör yalnız sınır aşılınca ya
+# da bu kadar yazımda bir (başka süreçlerin yazdıklarını da görmek için) taranır
+LLM_CACHE_RESCAN_EVERY = 256
+# Sınır aşılınca bu orana kadar atılır; sınırdayken her yazım yeniden taramaya yol açmasın
+LLM_CACHE_LOW_WATER = 0.9
+
+def llm_cache_enabled() -> bool:
+    return os.getenv("LLM_CACHE", "1").strip().lower() in ("1", "true")
+
+class ResponseCache:
+    """
+    İçerik adresli LLM yanıt önbelleği: anahtar = sha256(prompt, model, options).
+    Her kayıt ayrı bir JSON dosyası; dosya mtime'ı son erişimdir (LRU).
+    TTL'i geçen kayıt okunurken silinir; boyut/adet sınırı aşılınca en eski
+    erişilenler atılır. Toplam adet/boyut bellekte tutulur; put başına
+    klasör taranmaz.
+    """
+
+    def __init__(self, cache_dir: Path = LLM_CACHE_DIR, ttl: float = LLM_CACHE_TTL,
+                 max_bytes: int = int(LLM_CACHE_MAX_MB * 1024 * 1024),
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._count: Optional[int] = None  # None: henüz taranmadı
+        self._bytes = 0
+        self._since_scan = 0
+
+    @staticmethod
+    def key(prompt: str, model: str, options: Dict[str, Any]) -> str:
+        blob = json.dumps({"p": prompt, "m": model, "o": options}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if time.time() - float(data.get("created", 0)) > self.ttl:
+                self._remove(path)
+                raise FileNotFoundError(path)
+            os.utime(path)  # LRU: son erişim
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data.get("response")
+
+    def put(self, key: str, response: str, model: str = "") -> None:
+        if not response:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        payload = {"created": time.time(), "model": model, "response": response}
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        tmp.write_bytes(data)
+        try:
+            old = path.stat().st_size
+        except OSError:
+            old = None
+        os.replace(tmp, path)
+        with self._lock:
+            if self._count is not None:
+                self._count += old is None
+                self._bytes += len(data) - (old or 0)
+            self._since_scan += 1
+            scan = (self._count is None or self._since_scan >= LLM_CACHE_RESCAN_EVERY
+                    or self._count > self.max_entries or self._bytes > self.max_bytes)
+        if scan:
+            self._evict()
+
+    def _remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._count is not None:
+                self._count -= 1
+                self._bytes -= size
+
+    def _evict(self) -> None:
+        """Klasörü tarar, sayaçları tazeler; sınır aşıldıysa en eskileri alt eşiğe kadar atar."""
+        entries = []
+        total = 0
+        for p in self.dir.glob("*.json"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        n = len(entries)
+        if total > self.max_bytes or n > self.max_entries:
+            low_bytes = self.max_bytes * LLM_CACHE_LOW_WATER
+            low_n = int(self.max_entries * LLM_CACHE_LOW_WATER)
+            entries.sort()  # en eski erişilen önce
+            for _, size, p in entries:
+                if total <= low_bytes and n <= low_n:
+                    break
+                try:
+                    p.unlink()
+                except OSError:
+                    continue
+                total -= size
+                n -= 1
+                with self._lock:
+                    self.evictions += 1
+        with self._lock:
+            self._count, self._bytes, self._since_scan = n, total, 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+# süreç genelinde paylaşılan örnek
+RESPONSE_CACHE = ResponseCache()
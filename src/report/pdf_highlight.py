@@ -41,7 +41,8 @@ def build_annotated_pdf(original_pdf: str,
     """
     PDF üzerinde *sorunlu* yerleri vurgular.
     - 'missing' boyanmaz (metin yoktur).
-    - 'wrong' ve 'present' için hem 'title' hem de varsa 'detail' metni aranır.
+    - 'evidence' taşıyan bulgular doğrudan kanıt bbox'larına boyanır (arama yok).
+    - kanıtsız 'wrong' ve 'present' için 'title' ve varsa 'detail' metni aranır.
     """
     doc = fitz.open(original_pdf)
 
@@ -49,10 +50,41 @@ def build_annotated_pdf(original_pdf: str,
     COLOR = (0.00, 0.60, 0.00)   # koyu yeşil
     OPACITY = 0.35
 
+    def _paint(page: Any, rect: Any) -> None:
+        annot = page.add_highlight_annot(rect)
+        annot.set_colors(stroke=COLOR, fill=COLOR)
+        annot.update(opacity=OPACITY)
+
+    # sayfa → boyanmış dikdörtgenler (aynı yer bir kez boyanır)
+    done: Dict[int, set] = {}
+
+    def _mark(pno: int, rect: Any) -> bool:
+        key = tuple(round(c, 1) for c in rect)
+        seen_rects = done.setdefault(pno, set())
+        if key in seen_rects:
+            return False
+        seen_rects.add(key)
+        return True
+
+    # 0) kanıtlı bulgular: rules_engine'in kaydettiği satır bbox'ları
+    searched: list[Dict[str, Any]] = []
     for f in findings:
-        status = f.get("status")
-        if status not in HIGHLIGHT_STATUSES:
+        if f.get("status") not in HIGHLIGHT_STATUSES:
+            continue
+        evidence = f.get("evidence") or []
+        if not evidence:
+            searched.append(f)
             continue
+        for ev in evidence:
+            bbox, pno = ev.get("bbox"), (ev.get("page") or 0) - 1
+            if not bbox or not (0 <= pno < doc.page_count) or not _mark(pno, bbox):
+                continue
+            _paint(cast(Any, doc.load_page(pno)), fitz.Rect(bbox))
+
+    # 1) kalan bulgulardan tekil sorgular (varyantlar dahil)
+    queries: list[str] = []
+    seen: set[str] = set()
+    for f in searched:
 
         # Aranacak cümle/kelimeler: title + detail (varsa)
         candidates: list[str] = []
@@ -65,21 +97,25 @@ def build_annotated_pdf(original_pdf: str,
 
         for raw in candidates:
             for q in _variants(raw):
-                for p in doc:  # p: fitz.Page
-                    page = cast(Any, p)  # Pylance uyarısını gider: dinamik metotlar
-                    # hızlı kaba kontrol (performans)
-                    text = page.get_text("text") or ""  # type: ignore[attr-defined]
-                    if q.lower() not in text.lower():
-                        continue
-
-                    # PyMuPDF çoğu durumda duyarsız çalışır; yine de varyantları deniyoruz
-                    rects = page.search_for(q)  # type: ignore[attr-defined]
-                    # ek bir güvenlik: hiç bulamazsa trimlenmiş/upper varyant zaten _variants'ta var
-
-                    for r in rects:
-                        annot = page.add_highlight_annot(r)
-                        annot.set_colors(stroke=COLOR, fill=COLOR)
-                        annot.update(opacity=OPACITY)
+                if q not in seen:
+                    seen.add(q)
+                    queries.append(q)
+
+    # 2) her sayfa için tek TextPage: hem ön eleme metni hem aramalar onu kullanır;
+    #    aday sayfada tüm sorgular tek seferde, aynı dikdörtgen bir kez boyanır
+    if queries:
+        q_lc = [(q, q.lower()) for q in queries]
+        for pno in range(doc.page_count):
+            page = cast(Any, doc.load_page(pno))  # Pylance uyarısını gider: dinamik metotlar
+            tp = page.get_textpage(flags=fitz.TEXTFLAGS_SEARCH)  # type: ignore[attr-defined]
+            text = (page.get_text("text", textpage=tp) or "").lower()  # type: ignore[attr-defined]
+            for q, ql in q_lc:
+                if ql not in text:
+                    continue
+                # PyMuPDF çoğu durumda duyarsız çalışır; yine de varyantları deniyoruz
+                for r in page.search_for(q, textpage=tp):  # type: ignore[attr-defined]
+                    if _mark(pno, r):
+                        _paint(page, r)
 
     # Klasör yoksa oluştur
     out_dir = os.path.dirname(output_pdf)
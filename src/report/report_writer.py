@@ -1,12 +1,20 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Callable, Iterable
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import json
+import os
+import threading
 import yaml
 import pandas as pd
 
+from report.results_store import append_result
+
+FINDING_COLUMNS = ["rule_id", "base_rule_id", "title", "status", "severity", "detail"]
+
 # ===============================
 # Temel yardımcılar
 # ===============================
@@ -26,10 +34,27 @@ def _ensure_dir(out_dir: str) -> None:
 # ===============================
 # YAML yükleme ve severity eşleme
 # ===============================
+# (yol) → (mtime_ns, boyut, severity eşlemesi); YAML dosya değişmedikçe yeniden okunmaz
+_SEV_CACHE: Dict[str, Tuple[int, int, Dict[str, str]]] = {}
+_SEV_LOCK = threading.Lock()
+
 def _load_rules(rules_path: str) -> Dict[str, Any]:
     with open(rules_path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f) or {}
 
+def _severity_map_for(rules_path: str) -> Dict[str, str]:
+    """_severity_map(_load_rules(...)) sonucunu yol+mtime ile önbellekler."""
+    p = os.path.abspath(rules_path)
+    st = os.stat(p)
+    with _SEV_LOCK:
+        hit = _SEV_CACHE.get(p)
+        if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return hit[2]
+    sev = _severity_map(_load_rules(p))
+    with _SEV_LOCK:
+        _SEV_CACHE[p] = (st.st_mtime_ns, st.st_size, sev)
+    return sev
+
 def _severity_map(rules: Dict[str, Any]) -> Dict[str, str]:
     """
     rules.yaml içinden base-id -> severity eşlemesi üretir.
@@ -70,60 +95,64 @@ def _attach_severity(findings: List[Dict[str, Any]], sev_map: Dict[str, str]) ->
         out.append(g)
     return out
 
-# ===============================
-# Tekil kaydetme fonksiyonları
-# ===============================
-def save_json(result: Dict[str, Any], out_dir: str,
-              base_name: Optional[str] = None, ts: Optional[str] = None) -> str:
-    _ensure_dir(out_dir)
-    ts = ts or _timestamp()
-    stem = _safe_stem(base_name)
-    path = Path(out_dir) / f"{stem}_{ts}.json"
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
-    return str(path)
+def _findings_frame(findings: List[Dict[str, Any]]) -> pd.DataFrame:
+    df = pd.DataFrame(findings)
+    if df.empty:
+        return pd.DataFrame(columns=FINDING_COLUMNS)
+    return df[FINDING_COLUMNS]
 
-def save_csv(result: Dict[str, Any], rules_path: str, out_dir: str,
-             base_name: Optional[str] = None, ts: Optional[str] = None) -> str:
+def _enriched(result: Dict[str, Any], rules_path: str) -> Tuple[List[Dict[str, Any]], pd.DataFrame]:
+    """Severity eklenmiş bulgular ve tablo: bundle başına bir kez hesaplanır."""
+    findings = _attach_severity(result.get("findings", []), _severity_map_for(rules_path))
+    return findings, _findings_frame(findings)
+
+def _out_path(out_dir: str, base_name: Optional[str], ts: Optional[str], suffix: str) -> Path:
     _ensure_dir(out_dir)
-    ts = ts or _timestamp()
-    stem = _safe_stem(base_name)
-    path = Path(out_dir) / f"{stem}_{ts}.csv"
+    return Path(out_dir) / f"{_safe_stem(base_name)}_{ts or _timestamp()}{suffix}"
 
-    rules = _load_rules(rules_path)
-    sev_map = _severity_map(rules)
-    findings = _attach_severity(result.get("findings", []), sev_map)
+# ===============================
+# Tablodan yazıcılar (hesaplama yok, yalnız I/O)
+# ===============================
+def _write_csv(path: Path, df: pd.DataFrame) -> str:
+    df.to_csv(path, index=False, encoding="utf-8-sig")
+    return str(path)
 
-    df = pd.DataFrame(findings)
-    if df.empty:
-        df = pd.DataFrame(columns=["rule_id", "base_rule_id", "title", "status", "severity", "detail"])
-    else:
-        df = df[["rule_id", "base_rule_id", "title", "status", "severity", "detail"]]
+def _write_jsonl(path: Path, findings: List[Dict[str, Any]]) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        for g in findings:
+            f.write(json.dumps(g, ensure_ascii=False) + "\n")
+    return str(path)
 
-    df.to_csv(path, index=False, encoding="utf-8-sig")
+def _write_parquet(path: Path, df: pd.DataFrame) -> str:
+    # pyarrow/fastparquet yoksa ImportError yükselir (çağıran yakalar)
+    df.astype(str).to_parquet(path, index=False)
     return str(path)
 
-def save_summary_markdown(result: Dict[str, Any], rules_path: str, out_dir: str,
-                          base_name: Optional[str] = None, ts: Optional[str] = None) -> str:
-    """
-    Kuralların özetini (bulgular listesi dahil) Markdown olarak kaydeder.
-    """
-    _ensure_dir(out_dir)
-    ts = ts or _timestamp()
-    stem = _safe_stem(base_name)
-    path = Path(out_dir) / f"{stem}_{ts}.md"
+def _profile_frames(profile: Dict[str, Any]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """run_rules(profile=True) çıktısı → (kural bazında, tip bazında) tablolar."""
+    rules_df = pd.DataFrame(profile.get("by_rule", []),
+                            columns=["rule_id", "type", "wall_ms", "scans", "bytes",
+                                     "cached_scans", "cached_bytes", "findings"])
+    types_df = pd.DataFrame(
+        [{"type": t, **v} for t, v in (profile.get("by_type") or {}).items()],
+        columns=["type", "rules", "wall_ms", "scans", "bytes", "cached_scans", "cached_bytes"],
+    )
+    return rules_df, types_df
 
-    rules = _load_rules(rules_path)
-    sev_map = _severity_map(rules)
-    findings = _attach_severity(result.get("findings", []), sev_map)
+def _write_profile_csv(path: Path, profile: Dict[str, Any]) -> str:
+    _profile_frames(profile)[0].to_csv(path, index=False, encoding="utf-8-sig")
+    return str(path)
 
+def _write_summary_markdown(path: Path, result: Dict[str, Any], stem: str,
+                            findings: List[Dict[str, Any]]) -> str:
     sc = result.get("summary_counts", {}) or {}
     lines = []
     lines.append(f"# Rapor Özeti ({stem})\n")
     lines.append(f"- **Verdict:** {result.get('verdict')}")
     lines.append(
         f"- **present:** {sc.get('present', 0)}  |  **missing:** {sc.get('missing', 0)}  "
-        f"|  **wrong:** {sc.get('wrong', 0)}  |  **optional_absent:** {sc.get('optional_absent', 0)}\n"
+        f"|  **wrong:** {sc.get('wrong', 0)}  |  **optional_absent:** {sc.get('optional_absent', 0)}"
+        f"  |  **timeout:** {sc.get('timeout', 0)}\n"
     )
     lines.append("## Bulgular")
     if not findings:
@@ -138,33 +167,8 @@ def save_summary_markdown(result: Dict[str, Any], rules_path: str, out_dir: str,
     Path(path).write_text("\n".join(lines), encoding="utf-8")
     return str(path)
 
-def save_commentary_markdown(commentary_text: str, out_dir: str,
-                             base_name: Optional[str] = None, ts: Optional[str] = None) -> str:
-    """
-    Ollama vb. modelden gelen doğal dil yorumunu ayrı bir .md dosyasına kaydeder.
-    """
-    _ensure_dir(out_dir)
-    ts = ts or _timestamp()
-    stem = _safe_stem(base_name)
-    path = Path(out_dir) / f"{stem}_{ts}_commentary.md"
-    Path(path).write_text(commentary_text.strip() + "\n", encoding="utf-8")
-    return str(path)
-
-def save_excel(result: Dict[str, Any], rules_path: str, out_dir: str,
-               base_name: Optional[str] = None, ts: Optional[str] = None,
-               commentary_text: Optional[str] = None) -> str:
-    """
-    Excel: Overview + Findings + StatusCounts (+ Commentary, varsa)
-    """
-    _ensure_dir(out_dir)
-    ts = ts or _timestamp()
-    stem = _safe_stem(base_name)
-    path = Path(out_dir) / f"{stem}_{ts}.xlsx"
-
-    rules = _load_rules(rules_path)
-    sev_map = _severity_map(rules)
-    findings = _attach_severity(result.get("findings", []), sev_map)
-
+def _write_excel(path: Path, result: Dict[str, Any], df: pd.DataFrame,
+                 commentary_text: Optional[str] = None) -> str:
     # Overview sheet
     sc = result.get("summary_counts", {}) or {}
     overview = pd.DataFrame([
@@ -173,15 +177,9 @@ def save_excel(result: Dict[str, Any], rules_path: str, out_dir: str,
         {"Key": "missing", "Value": sc.get("missing", 0)},
         {"Key": "wrong", "Value": sc.get("wrong", 0)},
         {"Key": "optional_absent", "Value": sc.get("optional_absent", 0)},
+        {"Key": "timeout", "Value": sc.get("timeout", 0)},
     ])
 
-    # Findings sheet
-    df = pd.DataFrame(findings)
-    if df.empty:
-        df = pd.DataFrame(columns=["rule_id", "base_rule_id", "title", "status", "severity", "detail"])
-    else:
-        df = df[["rule_id", "base_rule_id", "title", "status", "severity", "detail"]]
-
     # StatusCounts sheet
     status_counts = (
         df.groupby(["status", "severity"], dropna=False).size().reset_index(name="count")
@@ -197,8 +195,135 @@ def save_excel(result: Dict[str, Any], rules_path: str, out_dir: str,
             cdf = pd.DataFrame({"Commentary": commentary_text.splitlines()})
             cdf.to_excel(writer, index=False, sheet_name="Commentary")
 
+        if result.get("profile"):
+            rules_df, types_df = _profile_frames(result["profile"])
+            rules_df.to_excel(writer, index=False, sheet_name="ProfileRules")
+            types_df.to_excel(writer, index=False, sheet_name="ProfileTypes")
+
+    return str(path)
+
+# ===============================
+# Tekil kaydetme fonksiyonları
+# ===============================
+def save_json(result: Dict[str, Any], out_dir: str,
+              base_name: Optional[str] = None, ts: Optional[str] = None) -> str:
+    _ensure_dir(out_dir)
+    ts = ts or _timestamp()
+    stem = _safe_stem(base_name)
+    path = Path(out_dir) / f"{stem}_{ts}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return str(path)
+
+def save_csv(result: Dict[str, Any], rules_path: str, out_dir: str,
+             base_name: Optional[str] = None, ts: Optional[str] = None) -> str:
+    path = _out_path(out_dir, base_name, ts, ".csv")
+    _, df = _enriched(result, rules_path)
+    return _write_csv(path, df)
+
+def save_summary_markdown(result: Dict[str, Any], rules_path: str, out_dir: str,
+                          base_name: Optional[str] = None, ts: Optional[str] = None) -> str:
+    """
+    Kuralların özetini (bulgular listesi dahil) Markdown olarak kaydeder.
+    """
+    path = _out_path(out_dir, base_name, ts, ".md")
+    findings, _ = _enriched(result, rules_path)
+    return _write_summary_markdown(path, result, _safe_stem(base_name), findings)
+
+def save_commentary_markdown(commentary_text: str, out_dir: str,
+                             base_name: Optional[str] = None, ts: Optional[str] = None) -> str:
+    """
+    Ollama vb. modelden gelen doğal dil yorumunu ayrı bir .md dosyasına kaydeder.
+    """
+    _ensure_dir(out_dir)
+    ts = ts or _timestamp()
+    stem = _safe_stem(base_name)
+    path = Path(out_dir) / f"{stem}_{ts}_commentary.md"
+    Path(path).write_text(commentary_text.strip() + "\n", encoding="utf-8")
     return str(path)
 
+def attach_commentary(paths: Dict[str, str], commentary_text: str) -> Dict[str, str]:
+    """
+    save_bundle ile yorumsuz yazılmış bir rapora sonradan yorum ekler:
+    aynı gövde + timestamp ile _commentary.md yazılır, Excel'e 'Commentary'
+    sayfası eklenir. Güncellenmiş yol sözlüğünü döner.
+    """
+    stem = Path(paths["json"]).with_suffix("")
+    out = dict(paths)
+    md = Path(f"{stem}_commentary.md")
+    md.write_text(commentary_text.strip() + "\n", encoding="utf-8")
+    out["commentary_md"] = str(md)
+    if paths.get("excel"):
+        cdf = pd.DataFrame({"Commentary": commentary_text.splitlines()})
+        with pd.ExcelWriter(paths["excel"], engine="openpyxl", mode="a",
+                            if_sheet_exists="replace") as writer:
+            cdf.to_excel(writer, index=False, sheet_name="Commentary")
+    return out
+
+def save_excel(result: Dict[str, Any], rules_path: str, out_dir: str,
+               base_name: Optional[str] = None, ts: Optional[str] = None,
+               commentary_text: Optional[str] = None) -> str:
+    """
+    Excel: Overview + Findings + StatusCounts (+ Commentary, ProfileRules/ProfileTypes; varsa)
+    """
+    path = _out_path(out_dir, base_name, ts, ".xlsx")
+    _, df = _enriched(result, rules_path)
+    return _write_excel(path, result, df, commentary_text)
+
+# ===============================
+# Toplu (çok raporlu) Excel — sabit bellek
+# ===============================
+AGGREGATE_COLUMNS = ["file", "sha1", "asset_type"] + FINDING_COLUMNS
+EXCEL_MAX_ROWS = 1_048_576  # sayfa başına (başlık dahil); aşılırsa Findings_2, Findings_3 …
+
+def save_aggregate_excel(
+    results: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]],
+    rules_path: str,
+    out_path: str,
+) -> Dict[str, int]:
+    """
+    Çok sayıda raporun bulgularını tek çalışma kitabına akıtır:
+      - Findings:     her bulgu bir satır (file, sha1, asset_type + bulgu kolonları)
+      - StatusCounts: asset_type × severity × status sayımları (pivot için uzun biçim)
+
+    `results` (meta, result) çiftleri üreten bir iterable'dır; meta en az
+    file/sha1/asset_type anahtarlarını taşır. openpyxl write-only modunda
+    satırlar diske akıtılır, bellekte yalnız sayaç tutulur.
+    Geriye {"documents": n, "rows": m} döner.
+    """
+    from openpyxl import Workbook
+
+    sev_map = _severity_map_for(rules_path)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Findings")
+    ws.append(AGGREGATE_COLUMNS)
+    sheet_no, sheet_rows = 1, 1
+    counts: Counter = Counter()
+    n_docs = n_rows = 0
+
+    for meta, result in results:
+        n_docs += 1
+        head = [meta.get("file", ""), meta.get("sha1", ""), meta.get("asset_type", "")]
+        for f in _attach_severity(result.get("findings", []) or [], sev_map):
+            if sheet_rows >= EXCEL_MAX_ROWS:
+                sheet_no += 1
+                ws = wb.create_sheet(f"Findings_{sheet_no}")
+                ws.append(AGGREGATE_COLUMNS)
+                sheet_rows = 1
+            ws.append(head + [f.get(c, "") for c in FINDING_COLUMNS])
+            sheet_rows += 1
+            n_rows += 1
+            counts[(head[2], f["severity"], f.get("status", ""))] += 1
+
+    sc = wb.create_sheet("StatusCounts")
+    sc.append(["asset_type", "severity", "status", "count"])
+    for (asset, sev, status), n in sorted(counts.items()):
+        sc.append([asset, sev, status, n])
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    wb.save(out_path)
+    return {"documents": n_docs, "rows": n_rows}
+
 # ===============================
 # Hepsini aynı timestamp ile kaydet (önerilen)
 # ===============================
@@ -209,25 +334,61 @@ def save_bundle(
     base_name: Optional[str] = None,
     commentary_text: Optional[str] = None,
     include_csv: bool = False,
+    include_jsonl: bool = False,
+    include_parquet: bool = False,
+    results_db: Optional[str] = None,
+    asset_type: Optional[str] = None,
+    doc_hash: Optional[str] = None,
 ) -> Dict[str, str]:
     """
-    JSON / Excel / Summary MD (+ Commentary MD) çıktılarını **aynı timestamp** ile üretir.
+    JSON / Excel / Summary MD (+ Commentary MD, CSV, JSONL, Parquet) çıktılarını
+    **aynı timestamp** ile üretir. Zenginleştirilmiş bulgu tablosu bir kez
+    hesaplanır; bağımsız dosyalar eşzamanlı yazılır.
+    Sonuçta 'profile' varsa (run_rules(profile=True)) kural profili ayrıca
+    _profile.csv'ye ve Excel'e (ProfileRules/ProfileTypes) yazılır.
+    results_db verilirse bulgular SQLite sonuç deposuna da eklenir
+    (asset_type ve doc_hash ile indekslenir).
     Geriye üretilen dosya yollarını döner.
     """
     ts = _timestamp()
-    paths: Dict[str, str] = {}
+    stem = _safe_stem(base_name)
+    _ensure_dir(out_dir)
+    findings, df = _enriched(result, rules_path)
 
-    paths["json"] = save_json(result, out_dir=out_dir, base_name=base_name, ts=ts)
-    paths["excel"] = save_excel(result, rules_path, out_dir=out_dir,
-                                base_name=base_name, ts=ts, commentary_text=commentary_text)
-    paths["summary_md"] = save_summary_markdown(result, rules_path, out_dir=out_dir,
-                                                base_name=base_name, ts=ts)
+    def p(suffix: str) -> Path:
+        return Path(out_dir) / f"{stem}_{ts}{suffix}"
 
+    jobs: Dict[str, Callable[[], str]] = {
+        "json": lambda: save_json(result, out_dir=out_dir, base_name=base_name, ts=ts),
+        "excel": lambda: _write_excel(p(".xlsx"), result, df, commentary_text),
+        "summary_md": lambda: _write_summary_markdown(p(".md"), result, stem, findings),
+    }
     if commentary_text:
-        paths["commentary_md"] = save_commentary_markdown(commentary_text, out_dir=out_dir,
-                                                          base_name=base_name, ts=ts)
-
+        jobs["commentary_md"] = lambda: save_commentary_markdown(commentary_text, out_dir=out_dir,
+                                                                 base_name=base_name, ts=ts)
     if include_csv:
-        paths["csv"] = save_csv(result, rules_path, out_dir=out_dir, base_name=base_name, ts=ts)
+        jobs["csv"] = lambda: _write_csv(p(".csv"), df)
+    if include_jsonl:
+        jobs["jsonl"] = lambda: _write_jsonl(p(".jsonl"), findings)
+    if include_parquet:
+        jobs["parquet"] = lambda: _write_parquet(p(".parquet"), df)
+    if result.get("profile"):
+        jobs["profile_csv"] = lambda: _write_profile_csv(p("_profile.csv"), result["profile"])
+    if results_db:
+        def _store() -> str:
+            append_result(results_db, {**result, "findings": findings},
+                          asset_type=asset_type or "", doc_hash=doc_hash or "", file=base_name)
+            return str(results_db)
+        jobs["results_db"] = _store
+
+    paths: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=len(jobs)) as ex:
+        futs = {k: ex.submit(fn) for k, fn in jobs.items()}
+        for k, fut in futs.items():
+            try:
+                paths[k] = fut.result()
+            except ImportError as e:
+                # opsiyonel biçim (ör. parquet motoru kurulu değil)
+                print(f"[UYARI] {k} yazılamadı: {str(e).splitlines()[0]}")
 
     return paths
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+Gömülü SQLite sonuç deposu.
+
+Her denetim (rapor × taşınmaz türü) `documents`'a bir satır, bulguları
+`findings`'e birer satır olarak eklenir. "tarla için bu çeyrek en çok hangi
+kurallar düşüyor" gibi sorular report/ klasörünü taramadan indeksli sorgu
+ile yanıtlanır.
+
+CLI:
+    python src/report/results_store.py failures --asset tarla --since 2025-07-01
+    python src/report/results_store.py trend --rule tapu.ada --period month
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+import argparse
+import os
+import sqlite3
+import threading
+
+RESULTS_DB = os.getenv(
+    "RESULTS_DB",
+    str(Path(__file__).resolve().parents[2] / "data" / "results.sqlite"),
+)
+
+# timeout: kural değerlendirilemedi; verdict'te olduğu gibi başarısız sayılır
+FAIL_STATUSES = ("missing", "wrong", "timeout")
+PERIOD_FORMATS = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m", "year": "%Y"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id              INTEGER PRIMARY KEY,
+    doc_hash        TEXT NOT NULL,
+    file            TEXT,
+    asset_type      TEXT NOT NULL,
+    verdict         TEXT,
+    present         INTEGER,
+    missing         INTEGER,
+    wrong           INTEGER,
+    optional_absent INTEGER,
+    timeout         INTEGER,
+    created_at      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS findings (
+    doc_id       INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    rule_id      TEXT NOT NULL,
+    base_rule_id TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    severity     TEXT,
+    title        TEXT,
+    base_title   TEXT,
+    detail       TEXT,
+    asset_type   TEXT NOT NULL,
+    created_at   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_documents_hash  ON documents(doc_hash, asset_type);
+CREATE INDEX IF NOT EXISTS ix_documents_time  ON documents(created_at);
+CREATE INDEX IF NOT EXISTS ix_findings_rule   ON findings(base_rule_id, status);
+CREATE INDEX IF NOT EXISTS ix_findings_asset  ON findings(asset_type, created_at, status);
+CREATE INDEX IF NOT EXISTS ix_findings_sev    ON findings(severity, status);
+CREATE INDEX IF NOT EXISTS ix_findings_doc    ON findings(doc_id);
+"""
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+def _base_title(title: Optional[str]) -> Optional[str]:
+    """Alt bulgu başlığı "Kural → Alan" biçiminde; kural başlığını döner."""
+    return title.split(" → ", 1)[0] if title else title
+
+class ResultsStore:
+    """
+    Bağlantı her işlemde açılıp kapanır; WAL + busy_timeout ile batch
+    süreçleri aynı dosyaya eşzamanlı ekleme yapabilir.
+    """
+
+    def __init__(self, path: str = RESULTS_DB):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as con:
+            con.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, timeout=30)
+        con.row_factory = sqlite3.Row
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA foreign_keys=ON")
+        return con
+
+    # ---------- yazma ----------
+    def append(self, result: Dict[str, Any], asset_type: str, doc_hash: str,
+               file: Optional[str] = None, created_at: Optional[str] = None) -> int:
+        """Bir run_rules sonucunu (severity eklenmiş bulgularla) ekler; doc id döner."""
+        ts = created_at or _now()
+        sc = result.get("summary_counts", {}) or {}
+        with closing(self._connect()) as con, con:
+            cur = con.execute(
+                "INSERT INTO documents (doc_hash, file, asset_type, verdict, present, missing, "
+                "wrong, optional_absent, timeout, created_at) VALUES (?,?,?,?,?,?,?,?,?,?)",
+                (doc_hash, file, asset_type, result.get("verdict"), sc.get("present", 0),
+                 sc.get("missing", 0), sc.get("wrong", 0), sc.get("optional_absent", 0),
+                 sc.get("timeout", 0), ts),
+            )
+            doc_id = int(cur.lastrowid)
+            con.executemany(
+                "INSERT INTO findings (doc_id, rule_id, base_rule_id, status, severity, title, "
+                "base_title, detail, asset_type, created_at) VALUES (?,?,?,?,?,?,?,?,?,?)",
+                [(doc_id, f.get("rule_id", ""),
+                  # alt bulgular "RULE:Alan" biçiminde
+                  f.get("base_rule_id") or str(f.get("rule_id", "")).split(":", 1)[0],
+                  f.get("status", ""), f.get("severity"), f.get("title"),
+                  _base_title(f.get("title")), f.get("detail"), asset_type, ts)
+                 for f in result.get("findings", []) or []],
+            )
+        return doc_id
+
+    # ---------- sorgular ----------
+    @staticmethod
+    def _where(asset_type: Optional[str], since: Optional[str], until: Optional[str],
+               base_rule_id: Optional[str] = None) -> tuple:
+        conds, args = [], []
+        if asset_type:
+            conds.append("asset_type = ?"); args.append(asset_type)
+        if since:
+            conds.append("created_at >= ?"); args.append(since)
+        if until:
+            conds.append("created_at < ?"); args.append(until)
+        if base_rule_id:
+            conds.append("base_rule_id = ?"); args.append(base_rule_id)
+        return (" WHERE " + " AND ".join(conds)) if conds else "", args
+
+    def failure_rates(self, asset_type: Optional[str] = None, since: Optional[str] = None,
+                      until: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Kural bazında değerlendirme / başarısız (missing+wrong+timeout) sayısı ve oranı."""
+        where, args = self._where(asset_type, since, until)
+        marks = ",".join("?" * len(FAIL_STATUSES))
+        sql = (
+            f"SELECT base_rule_id, MAX(COALESCE(base_title, title)) AS title, "
+            f"MAX(severity) AS severity, COUNT(*) AS evaluated, "
+            f"SUM(status IN ({marks})) AS failed, SUM(status = 'timeout') AS timeouts "
+            f"FROM findings{where} GROUP BY base_rule_id "
+            f"ORDER BY CAST(failed AS REAL) / evaluated DESC, failed DESC LIMIT ?"
+        )
+        with closing(self._connect()) as con:
+            rows = con.execute(sql, [*FAIL_STATUSES, *args, int(limit)]).fetchall()
+        return [dict(r, rate=round(r["failed"] / r["evaluated"], 4)) for r in rows]
+
+    def trend(self, base_rule_id: Optional[str] = None, asset_type: Optional[str] = None,
+              period: str = "month", since: Optional[str] = None,
+              until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Dönem (gün/hafta/ay/yıl) bazında başarısızlık oranı; kural verilirse yalnız o kural."""
+        fmt = PERIOD_FORMATS.get(period)
+        if fmt is None:
+            raise ValueError(f"Geçersiz dönem: {period} (seçenekler: {', '.join(PERIOD_FORMATS)})")
+        where, args = self._where(asset_type, since, until, base_rule_id)
+        marks = ",".join("?" * len(FAIL_STATUSES))
+        sql = (
+            f"SELECT strftime('{fmt}', created_at) AS period, COUNT(DISTINCT doc_id) AS documents, "
+            f"COUNT(*) AS evaluated, SUM(status IN ({marks})) AS failed, "
+            f"SUM(status = 'timeout') AS timeouts "
+            f"FROM findings{where} GROUP BY period ORDER BY period"
+        )
+        with closing(self._connect()) as con:
+            rows = con.execute(sql, [*FAIL_STATUSES, *args]).fetchall()
+        return [dict(r, rate=round(r["failed"] / r["evaluated"], 4)) for r in rows]
+
+_STORES: Dict[str, ResultsStore] = {}
+_STORES_LOCK = threading.Lock()
+
+def store_for(db_path: str) -> ResultsStore:
+    """Süreç başına dosya yolu başına tek depo; şema bir kez kurulur."""
+    key = str(Path(db_path).resolve())
+    with _STORES_LOCK:
+        st = _STORES.get(key)
+        if st is None:
+            st = _STORES[key] = ResultsStore(db_path)
+        return st
+
+def append_result(db_path: str, result: Dict[str, Any], asset_type: str, doc_hash: str,
+                  file: Optional[str] = None) -> int:
+    return store_for(db_path).append(result, asset_type, doc_hash, file=file)
+
+# ---------- CLI ----------
+def _print_rows(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        print("(kayıt yok)")
+        return
+    cols = list(rows[0].keys())
+    print("\t".join(cols))
+    for r in rows:
+        print("\t".join("" if r[c] is None else str(r[c]) for c in cols))
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Denetim sonuç deposu sorguları")
+    ap.add_argument("--db", default=RESULTS_DB, help="SQLite dosyası")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    f = sub.add_parser("failures", help="En sık düşen kurallar")
+    f.add_argument("--asset", help="Taşınmaz türü (ör. tarla)")
+    f.add_argument("--since", help="Başlangıç (ISO tarih, dahil)")
+    f.add_argument("--until", help="Bitiş (ISO tarih, hariç)")
+    f.add_argument("--limit", type=int, default=20)
+
+    t = sub.add_parser("trend", help="Dönemsel başarısızlık oranı")
+    t.add_argument("--rule", help="base_rule_id (ör. tapu.ada)")
+    t.add_argument("--asset", help="Taşınmaz türü")
+    t.add_argument("--period", default="month", choices=list(PERIOD_FORMATS))
+    t.add_argument("--since")
+    t.add_argument("--until")
+
+    args = ap.parse_args(argv)
+    store = ResultsStore(args.db)
+    if args.cmd == "failures":
+        _print_rows(store.failure_rates(args.asset, args.since, args.until, args.limit))
+    else:
+        _print_rows(store.trend(args.rule, args.asset, args.period, args.since, args.until))
+
+if __name__ == "__main__":
+    main()
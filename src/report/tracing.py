@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Hafif aşama izleme (tracing).
+
+    tr = tracer_from_env("rapor.pdf")
+    with tr:
+        with tr.span("read") as sp:
+            lines = read_pdf_lines(...)
+            sp["items"] = len(lines)
+    tr.dump()
+
+Her aşama için duvar saati, CPU süresi ve (TRACE_MEMORY=1 ise tracemalloc ile)
+tepe bellek; doküman için ayrıca toplamlar ve süreç tepe RSS'i kaydedilir.
+Çıktılar: TRACE_DIR/traces.jsonl (satır başına span + doküman özeti) ve
+doküman başına Chrome trace JSON'u (chrome://tracing, Perfetto).
+TRACE_PROFILE=1 ise doküman boyunca cProfile çalışır; .prof dosyası yazılır.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+try:  # Windows'ta yok
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "0").strip().lower() in ("1", "true")
+
+TRACE_DIR = Path(os.getenv(
+    "TRACE_DIR",
+    str(Path(__file__).resolve().parents[2] / "report" / "traces"),
+))
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)  # Linux: KB
+
+class Tracer:
+    """
+    Doküman başına bir izleyici. enabled=False iken span'ler yine ölçülür
+    (maliyeti iki saat okuması) ama dump() hiçbir şey yazmaz.
+    """
+
+    def __init__(self, doc: str, enabled: bool = True, profile: bool = False,
+                 memory: bool = False, out_dir: Path = TRACE_DIR):
+        self.doc = doc
+        self.enabled = enabled
+        self.profile = enabled and profile
+        self.memory = enabled and memory
+        self.out_dir = Path(out_dir)
+        self.spans: List[Dict[str, Any]] = []
+        self.summary: Dict[str, Any] = {}
+        self._t0 = self._c0 = 0.0
+        self._prof: Optional[cProfile.Profile] = None
+        self._own_tracemalloc = False
+        self._tid = threading.get_ident()
+
+    # ---------- doküman ----------
+    def __enter__(self) -> "Tracer":
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+        if self.profile:
+            self._prof = cProfile.Profile()
+            self._prof.enable()
+        self._t0, self._c0 = time.perf_counter(), time.process_time()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        wall = time.perf_counter() - self._t0
+        cpu = time.process_time() - self._c0
+        if self._prof is not None:
+            self._prof.disable()
+        peak = None
+        if self.memory and tracemalloc.is_tracing():
+            # span'ler tepe değeri sıfırlar; doküman tepesi span tepelerinin en büyüğü
+            peak = max([tracemalloc.get_traced_memory()[1] // 1024]
+                       + [sp.get("peak_kb") or 0 for sp in self.spans])
+            if self._own_tracemalloc:
+                tracemalloc.stop()
+        items: Dict[str, Any] = {}
+        for sp in self.spans:
+            items.update(sp.get("items") or {})
+        self.summary = {
+            "kind": "document", "doc": self.doc,
+            "wall_ms": round(wall * 1000, 3), "cpu_ms": round(cpu * 1000, 3),
+            "peak_kb": peak, "peak_rss_kb": _peak_rss_kb(),
+            "items": items, "error": exc[0].__name__ if exc and exc[0] else None,
+        }
+
+    # ---------- aşama ----------
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Aşama ölçümü. Dönen sözlüğe sayılar yazılabilir:
+        sp["items"] = {"headings": 12} ya da kısaca sp["items"] = 12.
+        """
+        rec: Dict[str, Any] = {"kind": "span", "doc": self.doc, "name": name, **attrs}
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        finally:
+            rec["start_ms"] = round((t0 - self._t0) * 1000, 3)
+            rec["wall_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+            rec["cpu_ms"] = round((time.process_time() - c0) * 1000, 3)
+            if self.memory and tracemalloc.is_tracing():
+                rec["peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+            if "items" in rec and not isinstance(rec["items"], dict):
+                rec["items"] = {name: rec["items"]}
+            self.spans.append(rec)
+
+    # ---------- çıktılar ----------
+    def chrome_trace(self) -> Dict[str, Any]:
+        pid = os.getpid()
+        events = [{
+            "name": self.doc, "ph": "X", "pid": pid, "tid": self._tid, "ts": 0,
+            "dur": int(self.summary.get("wall_ms", 0) * 1000),
+            "args": {k: v for k, v in self.summary.items() if k not in ("kind", "doc")},
+        }]
+        for sp in self.spans:
+            events.append({
+                "name": sp["name"], "ph": "X", "pid": pid, "tid": self._tid,
+                "ts": int(sp["start_ms"] * 1000), "dur": int(sp["wall_ms"] * 1000),
+                "args": {k: v for k, v in sp.items()
+                         if k not in ("kind", "doc", "name", "start_ms", "wall_ms")},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self) -> Dict[str, str]:
+        """traces.jsonl'e ekler, Chrome trace (+ .prof) yazar; yolları döner."""
+        if not self.enabled:
+            return {}
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stem = Path(self.doc).stem.replace(" ", "_")[:64] or "doc"
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        jsonl = self.out_dir / "traces.jsonl"
+        with jsonl.open("a", encoding="utf-8") as f:
+            for sp in self.spans:
+                f.write(json.dumps(sp, ensure_ascii=False, default=str) + "\n")
+            f.write(json.dumps({**self.summary, "ts": ts}, ensure_ascii=False, default=str) + "\n")
+        chrome = self.out_dir / f"trace_{stem}_{ts}.json"
+        chrome.write_text(json.dumps(self.chrome_trace(), ensure_ascii=False, default=str),
+                          encoding="utf-8")
+        paths = {"jsonl": str(jsonl), "chrome": str(chrome)}
+        if self._prof is not None:
+            prof = self.out_dir / f"profile_{stem}_{ts}.prof"
+            self._prof.dump_stats(str(prof))
+            paths["cprofile"] = str(prof)
+        return paths
+
+def tracer_from_env(doc: str) -> Tracer:
+    """TRACE=1 açar; TRACE_PROFILE=1 cProfile, TRACE_MEMORY=1 tracemalloc ekler."""
+    return Tracer(doc, enabled=_env_flag("TRACE"),
+                  profile=_env_flag("TRACE_PROFILE"), memory=_env_flag("TRACE_MEMORY"))
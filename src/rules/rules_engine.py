@@ -1,189 +1,722 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Callable, Optional, Pattern
+from collections.abc import Mapping
+from bisect import bisect_right
+from dataclasses import dataclass, field as dc_field
+from functools import lru_cache, partial
 from pathlib import Path
+import hashlib
+import json
+import multiprocessing as mp
+import os
 import re
+import threading
+import time
 import yaml
 
+from rules.trie import trie_regex
+
+# ---------- Profil sayaçları (opsiyonel) ----------
+# run_rules(profile=True) sırasında her regex taraması sayılır ve taranan
+# metnin UTF-8 bayt boyu toplanır; profil kapalıyken maliyet tek getattr.
+# Bölüm taramaları memoize edildiğinden tarama maliyeti ona ilk dokunan
+# kurala yazılır; sonraki kuralların önbellekten okudukları taramalar
+# ayrıca (cached_scans / cached_bytes) sayılır.
+_PROF = threading.local()
+
+def _new_counter() -> List[Any]:
+    # [tarama, bayt, önbellekten tarama, önbellekten bayt, bu kuralda görülen TextScan id'leri]
+    return [0, 0, 0, 0, set()]
+
+def _tick(text: str) -> None:
+    c = getattr(_PROF, "counter", None)
+    if c is not None:
+        c[0] += 1
+        c[1] += len(text.encode("utf-8"))
+
+def _touch(scan: "TextScan", cached: bool) -> None:
+    """Kural bir TextScan'in isabetlerini ilk kez okuduğunda; önbellekten ise sayılır."""
+    c = getattr(_PROF, "counter", None)
+    if c is not None and id(scan) not in c[4]:
+        c[4].add(id(scan))
+        if cached:
+            c[2] += 1
+            c[3] += len(scan.text.encode("utf-8"))
+
 # ---------- Yardımcılar ----------
 def load_yaml(path: str) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f) or {}
 
-def _find_all(patt: str, text: str) -> List[re.Match]:
+@lru_cache(maxsize=None)
+def _compile_regex(patt: str) -> Optional[Pattern[str]]:
+    """Regex'i bir kez derler; geçersiz desen için None döner."""
     try:
-        return list(re.finditer(patt, text, flags=re.IGNORECASE | re.MULTILINE))
+        return re.compile(patt, flags=re.IGNORECASE | re.MULTILINE)
     except re.error:
+        return None
+
+# ---------- Kullanıcı regex'leri: statik risk + zaman bütçesi ----------
+# kurallar.yaml'daki 're:' tanımları ve row_hint_regex kullanıcı girdisidir;
+# felaket geri izlemeli (catastrophic backtracking) bir desen işçiyi kilitlemesin.
+REGEX_BUDGET_MS = float(os.getenv("REGEX_BUDGET_MS", "250"))
+
+try:  # opsiyonel: zaman aşımı destekli regex motoru (pip install regex)
+    import regex as _regex  # type: ignore
+except ImportError:
+    _regex = None
+
+try:
+    from re import _parser as _sre  # 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre  # type: ignore
+
+class RegexTimeout(Exception):
+    """Kullanıcı deseni zaman bütçesini aştı."""
+
+    def __init__(self, pattern: str, budget_ms: float):
+        super().__init__(f"desen {budget_ms:.0f} ms bütçeyi aştı: {pattern}")
+        self.pattern = pattern
+        self.budget_ms = budget_ms
+
+_UNBOUNDED = 1000  # bu sayıdan büyük üst sınırlı tekrar da sınırsız sayılır
+
+def _first_atoms(items) -> List[str]:
+    """Dalın ilk atomu (örtüşme kontrolü için kaba imza)."""
+    if not items:
+        return ["<boş>"]
+    op, av = items[0]
+    if op == _sre.SUBPATTERN:
+        return _first_atoms(av[-1])
+    if op in (_sre.ANY, _sre.IN, _sre.MAX_REPEAT, _sre.MIN_REPEAT):
+        return ["<geniş>"]
+    return [f"{op}:{av}"]
+
+def _overlapping_branch(items) -> bool:
+    """Tekrar gövdesi, ilk atomu çakışan alternatiflerden mi oluşuyor? (ör. (a|ab)*)"""
+    for op, av in items:
+        if op == _sre.SUBPATTERN:
+            return _overlapping_branch(av[-1])
+        if op == _sre.BRANCH:
+            firsts = [a for alt in av[1] for a in _first_atoms(alt)]
+            return "<geniş>" in firsts or "<boş>" in firsts or len(firsts) != len(set(firsts))
+    return False
+
+def _risk_walk(items, in_repeat: bool) -> Optional[str]:
+    for op, av in items:
+        if op in (_sre.MAX_REPEAT, _sre.MIN_REPEAT):
+            lo, hi, sub = av
+            unbounded = hi == _sre.MAXREPEAT or hi > _UNBOUNDED
+            if unbounded and in_repeat:
+                return "iç içe sınırsız niceleyici (ör. (a+)+)"
+            if unbounded and _overlapping_branch(sub):
+                return "sınırsız tekrar altında örtüşen alternatifler (ör. (a|ab)*)"
+            # gövde birden çok kez tekrarlanabiliyorsa içteki sınırsız tekrar riskli
+            sub_risk = _risk_walk(sub, in_repeat or hi > 1)
+        elif op == _sre.SUBPATTERN:
+            sub_risk = _risk_walk(av[-1], in_repeat)
+        elif op == _sre.BRANCH:
+            sub_risk = next((r for alt in av[1] if (r := _risk_walk(alt, in_repeat))), None)
+        elif op in (_sre.ASSERT, _sre.ASSERT_NOT):
+            sub_risk = _risk_walk(av[1], in_repeat)
+        else:
+            sub_risk = None
+        if sub_risk:
+            return sub_risk
+    return None
+
+@lru_cache(maxsize=None)
+def regex_risk(patt: str) -> Optional[str]:
+    """Desen felaket geri izlemeye açıksa nedeni, değilse None (geçersiz desen: None)."""
+    try:
+        return _risk_walk(_sre.parse(patt, re.IGNORECASE | re.MULTILINE), False)
+    except (re.error, RecursionError):
+        return None
+
+@lru_cache(maxsize=None)
+def _compile_timed(patt: str):
+    return _regex.compile(patt, flags=_regex.IGNORECASE | _regex.MULTILINE | _regex.VERSION0)
+
+def _spans_server(conn) -> None:
+    """Alt süreç döngüsü: (desen, metin, first_only) alır, aralıkları döner."""
+    while True:
+        try:
+            patt, text, first_only = conn.recv()
+        except EOFError:
+            return
+        rx = _compile_regex(patt)  # süreç içinde de önbellekli
+        conn.send("ready")
+        if first_only:
+            m = rx.search(text)
+            conn.send([m.span()] if m else [])
+        else:
+            conn.send([m.span() for m in rx.finditer(text)])
+
+class _RegexWorker:
+    """
+    Riskli desenler için tekrar kullanılan tek alt süreç: eşleşme başına
+    süreç açılmaz. Bütçe aşılınca süreç öldürülür; sonraki çağrı yenisini açar.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._proc: Optional[mp.Process] = None
+        self._conn = None
+
+    def _start(self) -> None:
+        conn, child = mp.Pipe()
+        self._proc = mp.Process(target=_spans_server, args=(child,), daemon=True)
+        self._proc.start()
+        child.close()
+        self._conn = conn
+
+    def close(self) -> None:
+        if self._proc is not None:
+            if self._proc.is_alive():
+                self._proc.terminate()
+            self._proc.join()
+            self._conn.close()
+        self._proc = self._conn = None
+
+    def spans(self, patt: str, text: str, first_only: bool) -> List[Tuple[int, int]]:
+        with self._lock:
+            if self._proc is None or not self._proc.is_alive():
+                self.close()
+                self._start()
+            conn = self._conn
+            try:
+                conn.send((patt, text, first_only))
+                # süre, sürecin açılışından değil eşleştirmenin başlangıcından ölçülür
+                if conn.poll(30) and conn.recv() == "ready" and conn.poll(REGEX_BUDGET_MS / 1000):
+                    return conn.recv()
+            except (EOFError, OSError):
+                pass
+            self.close()
+            raise RegexTimeout(patt, REGEX_BUDGET_MS)
+
+_REGEX_WORKER = _RegexWorker()
+
+def _user_spans(patt: str, text: str, first_only: bool = False) -> List[Tuple[int, int]]:
+    """
+    Kullanıcı desenini zaman bütçesiyle çalıştırır:
+      - 'regex' paketi varsa: yerleşik timeout ile (tüm kullanıcı desenleri)
+      - yoksa: riskli işaretlenen (regex_risk) desenler tekrar kullanılan,
+        öldürülebilir alt süreçte (_RegexWorker); diğerleri doğrudan 're'
+        ile ve süre sınırı OLMADAN çalışır (koruma yalnız statik risk
+        analizidir; tam koruma için 'regex' paketi kurulmalı).
+    Bütçe aşılırsa RegexTimeout yükselir.
+    """
+    rx = _compile_regex(patt)
+    if rx is None:
         return []
+    _tick(text)
+    if _regex is not None:
+        try:
+            trx = _compile_timed(patt)
+            it = trx.finditer(text, timeout=REGEX_BUDGET_MS / 1000)
+            if first_only:
+                m = next(it, None)
+                return [m.span()] if m else []
+            return [m.span() for m in it]
+        except TimeoutError:
+            raise RegexTimeout(patt, REGEX_BUDGET_MS)
+        except _regex.error:
+            pass  # 'regex'in kabul etmediği (ama 're'nin derlediği) desen
+    if regex_risk(patt):
+        return _REGEX_WORKER.spans(patt, text, first_only)
+    if first_only:
+        m = rx.search(text)
+        return [m.span()] if m else []
+    return [m.span() for m in rx.finditer(text)]
 
-def _has_any_literal(words: List[str], text: str) -> bool:
-    """Kelime sınırıyla literal eşleşme."""
-    return any(re.search(rf"\b{re.escape(w)}\b", text, flags=re.I) for w in words if w)
+def _find_all(patt: str, text: str) -> List[Tuple[int, int]]:
+    """Kullanıcı deseninin tüm (başlangıç, bitiş) aralıkları (zaman bütçeli)."""
+    return _user_spans(patt, text)
 
-def _match_token(spec: str, text: str) -> bool:
+def _literal_alts(spec: str) -> List[str]:
+    """'a|b|c' → ['a', 'b', 'c'] (boşlar atılır)."""
+    return [s.strip() for s in spec.split("|") if s.strip()]
+
+@lru_cache(maxsize=None)
+def _compile_token(spec: str) -> Optional[Pattern[str]]:
     """
-    Esnek alan adı eşleşmesi:
+    Esnek alan adı tanımını derlenmiş desene çevirir:
       - 're:...' → regex olarak ara
       - 'a|b|c'  → bu alternatiflerden herhangi biri (literal)
       - diğer    → literal kelime
+    Boş/geçersiz tanım için None döner.
     """
+    spec = (spec or "").strip()
     if not spec:
-        return False
-    spec = spec.strip()
+        return None
     if spec.startswith("re:"):
         patt = spec[3:].strip()
-        if not patt:
-            return False
-        try:
-            return re.search(patt, text, flags=re.I | re.M) is not None
-        except re.error:
-            return False
-    if "|" in spec:
-        alts = [s.strip() for s in spec.split("|") if s.strip()]
-        return _has_any_literal(alts, text)
-    return _has_any_literal([spec], text)
+        return _compile_regex(patt) if patt else None
+    alts = _literal_alts(spec)
+    if not alts:
+        return None
+    body = "|".join(re.escape(w) for w in alts)
+    return re.compile(rf"\b(?:{body})\b", flags=re.I)
+
+def _match_token(spec: str, text: str) -> bool:
+    """Derlenmiş token desenini metinde arar (bkz. _compile_token)."""
+    spec = (spec or "").strip()
+    if spec.startswith("re:"):
+        patt = spec[3:].strip()
+        return bool(patt) and bool(_user_spans(patt, text, first_only=True))
+    rx = _compile_token(spec)
+    if rx is None:
+        return False
+    _tick(text)
+    return rx.search(text) is not None
+
+# YYYY-MM-DD, DD.MM.YYYY, DD/MM/YYYY vb.
+DATE_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})|(\d{2}[./-]\d{2}[./-]\d{4})")
 
 def _extract_date_hits(text: str) -> List[str]:
-    # YYYY-MM-DD, DD.MM.YYYY, DD/MM/YYYY vb.
-    patt = r"(\d{4}-\d{2}-\d{2})|(\d{2}[./-]\d{2}[./-]\d{4})"
-    return [m.group(0) for m in _find_all(patt, text)]
+    _tick(text)
+    return [m.group(0) for m in DATE_PATTERN.finditer(text)]
+
+# Bulgu başına en fazla kaç kanıt satırı tutulur
+EVIDENCE_LIMIT = 5
+
+# ---------- Tek geçişli literal eşleştirici ----------
+# re.I'nin Türkçe I/İ/ı eşdeğerliğini uzunluk değiştirmeden taklit eder
+_FOLD = str.maketrans({"İ": "i", "I": "i", "ı": "i", "ſ": "s", "\u212a": "k"})
+_WORD = re.compile(r"\w")
+
+# date_triplet'in aradığı etiketler (matcher'a hep eklenir)
+DATE_LABELS = ["talep", "keşif", "kesif", "rapor"]
+
+def _fold(s: str) -> str:
+    return s.translate(_FOLD).lower()
+
+def _is_word(ch: str) -> bool:
+    return _WORD.match(ch) is not None
+
+def _nested_tokens(outer: str, keys: List[str]) -> List[Tuple[str, int]]:
+    """
+    'outer' eşleştiğinde kelime sınırıyla birlikte kendiliğinden eşleşmiş
+    sayılan kısa token'lar ve ofsetleri (ör. 'yevmiye no' → 'yevmiye', 'no').
+    """
+    out: List[Tuple[str, int]] = []
+    for k in keys:
+        if len(k) >= len(outer):
+            continue
+        o = outer.find(k)
+        while o != -1:
+            e = o + len(k)
+            left = o == 0 or _is_word(outer[o - 1]) != _is_word(outer[o])
+            right = e == len(outer) or _is_word(outer[e - 1]) != _is_word(outer[e])
+            if left and right:
+                out.append((k, o))
+            o = outer.find(k, o + 1)
+    return out
+
+class LiteralMatcher:
+    """
+    Kural setindeki tüm literal token'lar için tek bir trie-regex.
+    Metni bir kez tarar ve her token'ın (katlanmış haliyle) geçtiği
+    başlangıç ofsetlerini döner; maliyet token sayısıyla değil metin
+    uzunluğuyla büyür.
+    """
+
+    def __init__(self, words: List[str]):
+        self.keys = sorted({_fold(w) for w in words if w and w.strip()})
+        self._rx: Optional[Pattern[str]] = None
+        if self.keys:
+            # lookahead: çakışan/iç içe başlangıçlar da yakalanır
+            self._rx = re.compile(rf"(?=\b({trie_regex(self.keys)})\b)")
+        self._nested = {k: _nested_tokens(k, self.keys) for k in self.keys}
+
+    def __contains__(self, word: str) -> bool:
+        return _fold(word) in self._nested
+
+    def scan(self, text: str) -> Dict[str, List[int]]:
+        """token (katlanmış) → artan başlangıç ofsetleri."""
+        if self._rx is None or not text:
+            return {}
+        _tick(text)
+        found: Dict[str, set] = {}
+        for m in self._rx.finditer(_fold(text)):
+            key, pos = m.group(1), m.start()
+            found.setdefault(key, set()).add(pos)
+            for sub, off in self._nested[key]:
+                found.setdefault(sub, set()).add(pos + off)
+        return {k: sorted(v) for k, v in found.items()}
+
+class TextScan:
+    """
+    Değerlendiricilere verilen metin görünümü. Literal token'lar ilk
+    ihtiyaçta tek geçişte taranır; 're:' tanımları derlenmiş regex ile aranır.
+    """
+
+    def __init__(self, text: str, matcher: Optional[LiteralMatcher] = None,
+                 parts: Optional[List[Tuple[int, "TextScan"]]] = None):
+        self.text = text
+        self.matcher = matcher
+        # parts: (ofset, parça taraması); '\\n\\n' ile birleştirilmiş bölümlerde
+        # isabetler parçalardan kaydırılarak türetilir, metin yeniden taranmaz
+        self._parts = parts
+        self._hits: Optional[Dict[str, List[int]]] = None
+        # (başlangıç, bitiş) → kaynak satır kayıtları; SectionIndex bağlar
+        self.locate: Optional[Callable[[int, int], List[Dict[str, Any]]]] = None
+
+    @property
+    def hits(self) -> Dict[str, List[int]]:
+        _touch(self, cached=self._hits is not None)
+        if self._hits is None:
+            if self._parts is not None:
+                merged: Dict[str, List[int]] = {}
+                for off, part in self._parts:
+                    for k, ps in part.hits.items():
+                        merged.setdefault(k, []).extend(p + off for p in ps)
+                self._hits = merged
+            else:
+                self._hits = self.matcher.scan(self.text) if self.matcher else {}
+        return self._hits
+
+    def spans(self, spec: str) -> List[Tuple[int, int]]:
+        """Tanımın metindeki (başlangıç, bitiş) aralıkları."""
+        spec = (spec or "").strip()
+        if not spec:
+            return []
+        rx = _compile_token(spec)
+        if spec.startswith("re:"):
+            patt = spec[3:].strip()
+            return _user_spans(patt, self.text) if patt else []
+        if self.matcher is None:
+            if rx is None:
+                return []
+            _tick(self.text)
+            return [m.span() for m in rx.finditer(self.text)]
+        out: List[Tuple[int, int]] = []
+        for alt in _literal_alts(spec):
+            if alt in self.matcher:
+                key = _fold(alt)
+                out.extend((p, p + len(key)) for p in self.hits.get(key, []))
+            else:
+                arx = _compile_token(alt)
+                if arx is not None:
+                    _tick(self.text)
+                    out.extend(m.span() for m in arx.finditer(self.text))
+        return sorted(set(out))
+
+    def evidence_at(self, spans: List[Tuple[int, int]],
+                    limit: int = EVIDENCE_LIMIT) -> List[Dict[str, Any]]:
+        """Aralıkları satır/sayfa/bbox kanıtına çevirir (satır başına bir kayıt)."""
+        if self.locate is None:
+            return []
+        out: List[Dict[str, Any]] = []
+        seen: set = set()
+        for a, b in spans:
+            for ev in self.locate(a, b):
+                if ev["line"] in seen:
+                    continue
+                seen.add(ev["line"])
+                out.append(ev)
+                if len(out) >= limit:
+                    return out
+        return out
+
+    def evidence(self, *specs: str) -> List[Dict[str, Any]]:
+        """Tanımların eşleştiği satırlar."""
+        spans = sorted({sp for spec in specs for sp in self.spans(spec)})
+        return self.evidence_at(spans)
+
+    def has(self, spec: str) -> bool:
+        spec = (spec or "").strip()
+        if not spec:
+            return False
+        if spec.startswith("re:") or self.matcher is None:
+            return _match_token(spec, self.text)
+        for alt in _literal_alts(spec):
+            if alt in self.matcher:
+                if _fold(alt) in self.hits:
+                    return True
+            elif _match_token(alt, self.text):
+                return True
+        return False
 
 # ---------- Bölümleme (başlık → metin) ----------
-def group_text_by_canonical(lines: List[Dict[str, Any]],
-                            headings: List[Dict[str, Any]]) -> Dict[str, str]:
-    # sayfa bazlı index listesi
-    idx_by_page: Dict[int, List[Tuple[int, Dict[str, Any]]]] = {}
-    for i, row in enumerate(lines):
-        idx_by_page.setdefault(row["page"], []).append((i, row))
+class SectionIndex(Mapping):
+    """
+    Doküman metni tek tamponda (boş olmayan satırlar '\\n' ile); her bölüm
+    bu tampona (başlangıç, bitiş) aralıkları olarak tutulur. Bölüm metni
+    yalnızca istendiğinde dilimlenir. Dict[str, str] gibi okunur.
+    """
+
+    def __init__(self, lines: List[Dict[str, Any]]):
+        self.lines = lines
+        texts = [(row.get("text") or "").strip() for row in lines]
+        parts = [t for t in texts if t]
+        self.buffer = "\n".join(parts)
+        # pos[i]: i. satırın (boşsa sonraki dolu satırın) tampon ofseti
+        self.pos: List[int] = [0] * (len(texts) + 1)
+        self.pos[len(texts)] = len(self.buffer) + 1
+        off = 0
+        for i, t in enumerate(texts):
+            self.pos[i] = off
+            if t:
+                off += len(t) + 1
+        # tampon sırasıyla dolu satırların index'i ve başlangıç ofseti (kanıt eşlemesi)
+        self._line_ids = [i for i, t in enumerate(texts) if t]
+        self._starts = [self.pos[i] for i in self._line_ids]
+        self.ranges: Dict[str, List[Tuple[int, int]]] = {}
+        self._cache: Dict[str, str] = {}
+        # doküman başına bölüm demeti önbellekleri (anahtar: bölüm adları tuple'ı)
+        self._bundles: Dict[Tuple[str, ...], str] = {}
+        self._scans: Dict[Tuple[Tuple[str, ...], int], TextScan] = {}
+
+    def add(self, name: str, first_line: int, end_line: int) -> None:
+        """[first_line, end_line) satırlarını bölüme ekler (boşsa eklenmez)."""
+        start, end = self.pos[first_line], self.pos[end_line] - 1
+        if end > start:
+            self.ranges.setdefault(name, []).append((start, end))
+            self._cache.clear()
+            self._bundles.clear()
+            self._scans.clear()
+
+    def __getitem__(self, name: str) -> str:
+        txt = self._cache.get(name)
+        if txt is None:
+            txt = self._cache[name] = "\n\n".join(self.buffer[a:b] for a, b in self.ranges[name])
+        return txt
+
+    def __iter__(self):
+        return iter(self.ranges)
+
+    def __len__(self) -> int:
+        return len(self.ranges)
+
+    def bundle(self, names: Tuple[str, ...]) -> str:
+        """Bölümlerin '\\n\\n' ile birleşimi; her demet doküman başına bir kez kurulur."""
+        txt = self._bundles.get(names)
+        if txt is None:
+            txt = self._bundles[names] = "\n\n".join(self[w] for w in names)
+        return txt
+
+    def _segments(self, names: Tuple[str, ...]) -> List[Tuple[int, int, int]]:
+        """Demet metnindeki (demet ofseti, tampon ofseti, uzunluk) parçaları."""
+        segs: List[Tuple[int, int, int]] = []
+        off = 0
+        for w in names:
+            for k, (a, b) in enumerate(self.ranges.get(w, [])):
+                if k:
+                    off += 2
+                segs.append((off, a, b - a))
+                off += b - a
+            off += 2
+        return segs
+
+    def lines_in(self, buf_start: int, buf_end: int) -> List[int]:
+        """Tamponda [buf_start, buf_end) ile kesişen satırların index'leri."""
+        j = max(0, bisect_right(self._starts, buf_start) - 1)
+        out: List[int] = []
+        while j < len(self._starts) and self._starts[j] < buf_end:
+            i = self._line_ids[j]
+            if self._starts[j] + len((self.lines[i].get("text") or "").strip()) > buf_start:
+                out.append(i)
+            j += 1
+        return out
+
+    def _locator(self, names: Tuple[str, ...]) -> Callable[[int, int], List[Dict[str, Any]]]:
+        segs = self._segments(names)
+        seg_starts = [sg[0] for sg in segs]
+
+        def locate(start: int, end: int) -> List[Dict[str, Any]]:
+            out: List[Dict[str, Any]] = []
+            k = max(0, bisect_right(seg_starts, start) - 1)
+            while k < len(segs) and segs[k][0] < end:
+                off, a, ln = segs[k]
+                s0, e0 = max(start, off), min(end, off + ln)
+                if e0 > s0:
+                    for i in self.lines_in(a + s0 - off, a + e0 - off):
+                        row = self.lines[i]
+                        out.append({"line": i, "page": row.get("page"), "bbox": row.get("bbox"),
+                                    "text": (row.get("text") or "").strip()})
+                k += 1
+            return out
+
+        return locate
+
+    def scan(self, names: Tuple[str, ...], matcher: Optional[LiteralMatcher] = None) -> TextScan:
+        """Demet için TextScan; literal isabetler bölüm taramalarından türetilir."""
+        key = (names, id(matcher))
+        sc = self._scans.get(key)
+        if sc is not None:
+            return sc
+        if len(names) == 1 or matcher is None:
+            sc = TextScan(self.bundle(names), matcher)
+        else:
+            parts: List[Tuple[int, TextScan]] = []
+            off = 0
+            for w in names:
+                parts.append((off, self.scan((w,), matcher)))
+                off += len(self[w]) + 2
+            sc = TextScan(self.bundle(names), matcher, parts=parts)
+        sc.locate = self._locator(names)
+        self._scans[key] = sc
+        return sc
 
-    # başlıkların satır index’ini bul
-    heads_idx: List[Tuple[int, str, str]] = []  # (index, canon, text)
+def _heading_line_indices(lines: List[Dict[str, Any]],
+                          headings: List[Dict[str, Any]]) -> List[Tuple[int, str]]:
+    """
+    Başlıkların satır index'leri. detect_headings 'line' taşır; taşımayan
+    (eski/harici) başlıklar için aynı sayfadaki ilk birebir metin eşleşmesi.
+    Not: 'line' ile aynı sayfada aynı metinli iki başlık ayrı bölüm açar;
+    eski metin eşleştirmesinde ikincisi de ilk satıra düşer, aradaki metin
+    önceki bölüme karışırdı.
+    """
+    first_on_page: Optional[Dict[Tuple[Any, str], int]] = None
+    heads_idx: List[Tuple[int, str]] = []  # (index, canon)
     for h in headings:
         canon = (h.get("canonical") or "").strip()
         if not canon:
             continue
-        page = h["page"]
-        htext = (h.get("text") or "").strip()
-        for idx, row in idx_by_page.get(page, []):
-            if (row.get("text") or "").strip() == htext:
-                heads_idx.append((idx, canon, htext))
-                break
-
+        idx = h.get("line")
+        if idx is None:
+            if first_on_page is None:
+                first_on_page = {}
+                for i, row in enumerate(lines):
+                    first_on_page.setdefault((row["page"], (row.get("text") or "").strip()), i)
+            idx = first_on_page.get((h["page"], (h.get("text") or "").strip()))
+            if idx is None:
+                continue
+        heads_idx.append((idx, canon))
     heads_idx.sort(key=lambda x: x[0])
+    return heads_idx
 
-    sections: Dict[str, List[str]] = {}
-    for k in range(len(heads_idx)):
-        start_idx, canon, _ = heads_idx[k]
+def build_section_index(lines: List[Dict[str, Any]],
+                        headings: List[Dict[str, Any]]) -> SectionIndex:
+    index = SectionIndex(lines)
+    heads_idx = _heading_line_indices(lines, headings)
+    for k, (start_idx, canon) in enumerate(heads_idx):
         end_idx = heads_idx[k + 1][0] if k + 1 < len(heads_idx) else len(lines)
-        body = []
-        for j in range(start_idx + 1, end_idx):
-            t = (lines[j].get("text") or "").strip()
-            if t:
-                body.append(t)
-        if body:
-            sections.setdefault(canon, []).append("\n".join(body))
-    return {k: "\n\n".join(v) for k, v in sections.items()}
+        index.add(canon, start_idx + 1, max(start_idx + 1, end_idx))
+    return index
+
+def group_text_by_canonical(lines: List[Dict[str, Any]],
+                            headings: List[Dict[str, Any]]) -> Dict[str, str]:
+    return dict(build_section_index(lines, headings))
 
 # ---------- Rule-type değerlendiriciler ----------
-def eval_required_fields(rule: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
+def _with_evidence(finding: Dict[str, Any], evidence: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Kanıt varsa bulguya 'evidence' (satır, sayfa, bbox) ekler."""
+    if evidence:
+        finding["evidence"] = evidence
+    return finding
+
+def eval_required_fields(rule: Dict[str, Any], scan: TextScan) -> List[Dict[str, Any]]:
     out = []
     for fld in rule.get("fields", []):
-        ok = _match_token(fld, text)
-        out.append({
+        ok = scan.has(fld)
+        out.append(_with_evidence({
             "rule_id": rule["id"] + f":{fld}",
             "status": "present" if ok else "missing",
             "title": f"{rule['title']} → {fld}",
-        })
+        }, scan.evidence(fld) if ok else []))
     return out
 
-def eval_nonempty_text(rule: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
-    ok = bool(text.strip())
+def eval_nonempty_text(rule: Dict[str, Any], scan: TextScan) -> List[Dict[str, Any]]:
+    ok = bool(scan.text.strip())
     return [{"rule_id": rule["id"], "status": "present" if ok else "missing", "title": rule["title"]}]
 
-def eval_coexist(rule: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
+def eval_coexist(rule: Dict[str, Any], scan: TextScan) -> List[Dict[str, Any]]:
     fields = rule.get("fields", [])
-    ok = all(_match_token(f, text) for f in fields)
-    return [{"rule_id": rule["id"], "status": "present" if ok else "missing", "title": rule["title"]}]
+    ok = all(scan.has(f) for f in fields)
+    return [_with_evidence({"rule_id": rule["id"], "status": "present" if ok else "missing", "title": rule["title"]},
+                           scan.evidence(*fields) if ok else [])]
 
-def eval_table_columns(rule: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
+def eval_table_columns(rule: Dict[str, Any], scan: TextScan) -> List[Dict[str, Any]]:
     cols = rule.get("columns_required", []) or rule.get("constraints", {}).get("columns_required", [])
     out = []
     for c in cols:
-        ok = _match_token(c, text)
-        out.append({
+        ok = scan.has(c)
+        out.append(_with_evidence({
             "rule_id": rule["id"] + f":{c}",
             "status": "present" if ok else "missing",
             "title": f"{rule['title']} → kolon {c}",
-        })
+        }, scan.evidence(c) if ok else []))
     return out
 
-def eval_list_min_count(rule: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
+def eval_list_min_count(rule: Dict[str, Any], scan: TextScan) -> List[Dict[str, Any]]:
     # emsal için satır ipucu
     hint = rule.get("row_hint_regex", r"(Emsal|Karşılaştırılabilir)")
-    hits = _find_all(hint, text)
+    hits = _find_all(hint, scan.text)
     cnt = len(hits)
     need = int(rule.get("min", rule.get("min_count", 0)))
     st = "present" if cnt >= need else "wrong"
-    return [{"rule_id": rule["id"], "status": st, "title": rule["title"], "detail": f"adet={cnt}, min={need}"}]
+    return [_with_evidence({"rule_id": rule["id"], "status": st, "title": rule["title"],
+                            "detail": f"adet={cnt}, min={need}"},
+                           scan.evidence_at(hits))]
 
-def eval_enum(rule: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
+def eval_enum(rule: Dict[str, Any], scan: TextScan) -> List[Dict[str, Any]]:
     allowed = rule.get("allowed", [])
-    ok = any(_match_token(a, text) for a in allowed)
-    return [{"rule_id": rule["id"], "status": "present" if ok else "missing", "title": rule["title"]}]
+    ok = any(scan.has(a) for a in allowed)
+    return [_with_evidence({"rule_id": rule["id"], "status": "present" if ok else "missing", "title": rule["title"]},
+                           scan.evidence(*allowed) if ok else [])]
 
-def eval_flags(rule: Dict[str, Any], text: str, optional=False) -> List[Dict[str, Any]]:
+def eval_flags(rule: Dict[str, Any], scan: TextScan, optional=False) -> List[Dict[str, Any]]:
     flags = rule.get("flags", [])
     out = []
     for fl in flags:
-        ok = _match_token(fl, text)
+        ok = scan.has(fl)
         status = "present" if ok else ("optional_absent" if optional else "missing")
-        out.append({"rule_id": rule["id"] + f":{fl}", "status": status, "title": f"{rule['title']} → {fl}"})
+        out.append(_with_evidence({"rule_id": rule["id"] + f":{fl}", "status": status,
+                                   "title": f"{rule['title']} → {fl}"},
+                                  scan.evidence(fl) if ok else []))
     return out
 
-def eval_date_triplet(rule: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
-    hits = _extract_date_hits(text)
+def eval_date_triplet(rule: Dict[str, Any], scan: TextScan) -> List[Dict[str, Any]]:
+    _tick(scan.text)
+    dates = list(DATE_PATTERN.finditer(scan.text))
     # talep/keşif/rapor kelimelerine yakın tarih var mı?
-    need_labels = ["talep", "keşif", "kesif", "rapor"]
     found = {lab: False for lab in ["talep", "kesif", "rapor"]}
-    for lab in need_labels:
-        if _find_all(rf"\b{lab}\b", text):
-            if hits:
+    for lab in DATE_LABELS:
+        if scan.has(lab):
+            if dates:
                 # kaba yakınlık: aynı paragrafta tarih geçiyorsa say
                 found["kesif" if lab in ("keşif", "kesif") else lab] = True
     ok = all(found.values())
-    return [{
+    return [_with_evidence({
         "rule_id": rule["id"],
         "status": "present" if ok else "missing",
         "title": rule["title"],
-        "detail": f"bulunan: {found}, tarih_sayısı: {len(hits)}",
-    }]
+        "detail": f"bulunan: {found}, tarih_sayısı: {len(dates)}",
+    }, scan.evidence_at([m.span() for m in dates]) if ok else [])]
 
-def eval_attachments(rule: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
+def eval_attachments(rule: Dict[str, Any], scan: TextScan) -> List[Dict[str, Any]]:
     req = (rule.get("attachments") or {}).get("required", [])
     opt = (rule.get("attachments") or {}).get("optional", [])
     out = []
     for a in req:
-        ok = _match_token(a, text)
-        out.append({"rule_id": rule["id"] + f":{a}", "status": "present" if ok else "missing", "title": f"Ek zorunlu: {a}"})
+        ok = scan.has(a)
+        out.append(_with_evidence({"rule_id": rule["id"] + f":{a}", "status": "present" if ok else "missing",
+                                   "title": f"Ek zorunlu: {a}"},
+                                  scan.evidence(a) if ok else []))
     for a in opt:
-        ok = _match_token(a, text)
-        out.append({"rule_id": rule["id"] + f":{a}",
-                    "status": "present" if ok else "optional_absent",
-                    "title": f"Ek opsiyonel: {a}"})
+        ok = scan.has(a)
+        out.append(_with_evidence({"rule_id": rule["id"] + f":{a}",
+                                   "status": "present" if ok else "optional_absent",
+                                   "title": f"Ek opsiyonel: {a}"},
+                                  scan.evidence(a) if ok else []))
     return out
 
-def eval_quality_rules(rule: Dict[str, Any], text: str) -> List[Dict[str, Any]]:
+def eval_quality_rules(rule: Dict[str, Any], scan: TextScan) -> List[Dict[str, Any]]:
     out = []
     for r in rule.get("rules", []):
         kind = r.get("kind")
         if kind == "forbid_terms":
             terms = r.get("terms", [])
-            bad = [t for t in terms if _match_token(t, text)]
-            out.append({"rule_id": rule["id"] + ":forbid_terms",
-                        "status": "wrong" if bad else "present",
-                        "title": "Yasaklı ifade", "detail": ", ".join(bad)})
+            bad = [t for t in terms if scan.has(t)]
+            out.append(_with_evidence({"rule_id": rule["id"] + ":forbid_terms",
+                                       "status": "wrong" if bad else "present",
+                                       "title": "Yasaklı ifade", "detail": ", ".join(bad)},
+                                      scan.evidence(*bad)))
         elif kind == "date_format":
-            ok = bool(_extract_date_hits(text))  # şimdilik varlık kontrolü
+            ok = bool(_extract_date_hits(scan.text))  # şimdilik varlık kontrolü
             out.append({"rule_id": rule["id"] + ":date", "status": "present" if ok else "missing",
                         "title": "Tarih formatı (kaba)"})
         else:
@@ -231,84 +764,422 @@ FIELD_SECTION_HINT = {
     "InsaatYiliSinifi": ["kimlik", "ruhsat"],
 }
 
-def _concat_sections(text_by_section: Dict[str, str], field_name: str) -> str:
-    desired = FIELD_SECTION_HINT.get(field_name, [])
+def _bundle_key(text_by_section: Mapping, field_name: Optional[str]) -> Tuple[str, ...]:
+    """Alanın okuyacağı (mevcut) bölüm adları; ipucu yoksa tüm bölümler."""
+    desired = FIELD_SECTION_HINT.get(field_name or "", [])
     if not desired:
-        return "\n\n".join(text_by_section.values())
-    return "\n\n".join([text_by_section.get(w, "") for w in desired if w in text_by_section])
+        return tuple(text_by_section)
+    return tuple(w for w in desired if w in text_by_section)
+
+def _concat_sections(text_by_section: Dict[str, str], field_name: str) -> str:
+    key = _bundle_key(text_by_section, field_name)
+    if isinstance(text_by_section, SectionIndex):
+        return text_by_section.bundle(key)
+    return "\n\n".join(text_by_section[w] for w in key)
+
+# ---------- Derlenmiş kural planı ----------
+def _eval_partial(rule: Dict[str, Any], scan: TextScan) -> List[Dict[str, Any]]:
+    # Basit/kısmi destek (TODO ayrıntılandırılabilir)
+    return [{
+        "rule_id": rule["id"],
+        "status": "present" if scan.text.strip() else "missing",
+        "title": rule["title"],
+        "detail": f"TYPE={rule.get('type')} (kısmi kontrol)",
+    }]
+
+def _eval_unsupported(rule: Dict[str, Any], scan: TextScan) -> List[Dict[str, Any]]:
+    return [{
+        "rule_id": rule["id"],
+        "status": "present",
+        "title": f"{rule['title']} (desteklenmeyen type: {rule.get('type')})",
+    }]
+
+Evaluator = Callable[[Dict[str, Any], TextScan], List[Dict[str, Any]]]
+
+EVALUATORS: Dict[str, Evaluator] = {
+    "required_fields": eval_required_fields,
+    "nonempty_text": eval_nonempty_text,
+    "coexist": eval_coexist,
+    "table_columns": eval_table_columns,
+    "takidat_table": eval_table_columns,
+    "list_min_count": eval_list_min_count,
+    "enum": eval_enum,
+    "flags": partial(eval_flags, optional=False),
+    "flags_optional": partial(eval_flags, optional=True),
+    "date_triplet": eval_date_triplet,
+    "attachments_check": eval_attachments,
+    "quality_rules": eval_quality_rules,
+    "separate_calc": _eval_partial,
+    "doc_triplet_match": _eval_partial,
+    "compare_required": _eval_partial,
+    "area_pair": _eval_partial,
+    "boolean_required": _eval_partial,
+    "composite_presence": _eval_partial,
+}
+
+def _rule_tokens(rule: Dict[str, Any]) -> List[str]:
+    """Kuralın _match_token ile aranan tüm alan/kolon/bayrak tanımları."""
+    att = rule.get("attachments") or {}
+    cols = rule.get("columns_required", []) or (rule.get("constraints") or {}).get("columns_required", [])
+    out: List[str] = []
+    for arr in (rule.get("fields", []), cols, rule.get("allowed", []), rule.get("flags", []),
+                att.get("required", []), att.get("optional", [])):
+        out.extend(str(t) for t in arr or [] if t)
+    for q in rule.get("rules", []) or []:
+        if q.get("kind") == "forbid_terms":
+            out.extend(str(t) for t in q.get("terms", []) or [] if t)
+    return out
+
+# Değerlendirici davranışı değişince artırın: tüm kural özetleri (digest) değişir,
+# yeniden denetimde eski bulgular kullanılmaz
+RULES_ENGINE_VERSION = "eval_v1"
+
+def rule_digest(rule: Dict[str, Any]) -> str:
+    """Kural tanımının (motor sürümüyle birlikte) kararlı özeti."""
+    blob = json.dumps([RULES_ENGINE_VERSION, rule], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+@dataclass
+class CompiledRule:
+    rule: Dict[str, Any]          # id'si garanti edilmiş kopya
+    rtype: Optional[str]
+    field: Optional[str]
+    evaluate: Evaluator
+    digest: str = ""
+
+@dataclass
+class RulePlan:
+    """
+    kurallar.yaml'ın bir kez yüklenip derlenmiş hali.
+    Token desenleri ve type → değerlendirici eşlemesi önceden çözülür;
+    aynı plan tüm dokümanlar için tekrar kullanılır.
+    """
+    source: str
+    metadata: Dict[str, Any]
+    common: List[CompiledRule]
+    by_type: Dict[str, List[CompiledRule]]
+    patterns: Dict[str, Optional[Pattern[str]]] = dc_field(default_factory=dict)
+    matcher: LiteralMatcher = dc_field(default_factory=lambda: LiteralMatcher([]))
+    risky: Dict[str, str] = dc_field(default_factory=dict)   # kural id → riskli desen uyarısı
+
+    def queue(self, asset_type: str) -> List[CompiledRule]:
+        """common + by_type[asset_type] kural sırası."""
+        return self.common + self.by_type.get(asset_type, [])
+
+def _compile_rule(raw: Dict[str, Any], patterns: Dict[str, Optional[Pattern[str]]],
+                  risky: Optional[Dict[str, str]] = None) -> CompiledRule:
+    r = dict(raw)  # kopya
+    r.setdefault("id", r.get("title", "RULE").upper().replace(" ", "_"))
+    rtype = r.get("type")
+    user_patterns: List[str] = []
+    for spec in _rule_tokens(r):
+        patterns[spec] = _compile_token(spec)
+        if spec.strip().startswith("re:"):
+            user_patterns.append(spec.strip()[3:].strip())
+    if r.get("row_hint_regex"):
+        _compile_regex(r["row_hint_regex"])
+        user_patterns.append(r["row_hint_regex"])
+    if risky is not None:
+        for patt in user_patterns:
+            reason = regex_risk(patt)
+            if reason:
+                risky[r["id"]] = f"{reason}: {patt}"
+    return CompiledRule(
+        rule=r,
+        rtype=rtype,
+        field=r.get("field"),
+        evaluate=EVALUATORS.get(rtype or "", _eval_unsupported),
+        digest=rule_digest(r),
+    )
+
+def compile_rules(rules: Dict[str, Any], source: str = "<dict>") -> RulePlan:
+    """Ham kural sözlüğünden RulePlan üretir."""
+    patterns: Dict[str, Optional[Pattern[str]]] = {}
+    risky: Dict[str, str] = {}
+    common = [_compile_rule(r, patterns, risky) for r in rules.get("common", []) or []]
+    by_type = {
+        t: [_compile_rule(r, patterns, risky) for r in arr or []]
+        for t, arr in (rules.get("by_type") or {}).items()
+    }
+    for rid, msg in risky.items():
+        print(f"[UYARI] {source}: {rid} riskli regex ({msg}); "
+              f"eşleşme {REGEX_BUDGET_MS:.0f} ms bütçe ile sınırlanacak")
+    # tüm kurallardaki literal alternatifler tek eşleştiricide toplanır
+    literals = [alt for spec in patterns if not spec.strip().startswith("re:")
+                for alt in _literal_alts(spec)]
+    return RulePlan(
+        source=source,
+        metadata=rules.get("metadata") or {},
+        common=common,
+        by_type=by_type,
+        patterns=patterns,
+        matcher=LiteralMatcher(literals + DATE_LABELS),
+        risky=risky,
+    )
+
+# (yol) → (mtime_ns, boyut, plan); uzun ömürlü süreçte dosya değişmedikçe yeniden derlenmez
+_PLAN_CACHE: Dict[str, Tuple[int, int, RulePlan]] = {}
+_PLAN_LOCK = threading.Lock()
+
+def load_rule_plan(rules_path: str) -> RulePlan:
+    """Kural dosyasını yol+mtime önbelleği üzerinden derlenmiş plan olarak döner."""
+    p = Path(rules_path).resolve()
+    st = p.stat()
+    key = str(p)
+    with _PLAN_LOCK:
+        hit = _PLAN_CACHE.get(key)
+        if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return hit[2]
+    plan = compile_rules(load_yaml(key), source=key)
+    with _PLAN_LOCK:
+        _PLAN_CACHE[key] = (st.st_mtime_ns, st.st_size, plan)
+    return plan
 
 # ---------- Rule yürütücü ----------
-def run_rules(lines: List[Dict[str, Any]],
-              headings: List[Dict[str, Any]],
-              rules_path: str,
-              asset_type: str = "arsa") -> Dict[str, Any]:
-    rules = load_yaml(rules_path)
+# Aynı girdiyle farklı çıkabilecek durumlar; yeniden denetimde hep tekrar denenir
+NONDETERMINISTIC_STATUSES = frozenset({"timeout"})
 
-    # PDF metnini bölümlere ayır
-    text_by_section = group_text_by_canonical(lines, headings)
+def _reusable_findings(queue: List[CompiledRule],
+                       previous: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Önceki sonuçtan tanımı (digest) değişmemiş kuralların bulguları.
+    Bulgu sahibi rule_id'nin ':' öncesidir; id'sinde ':' olan ya da
+    tekrarlanan kurallar her zaman yeniden değerlendirilir. Deterministik
+    olmayan sonuçlar (NONDETERMINISTIC_STATUSES, ör. zaman aşımı) taşınmaz.
+    """
+    prev_hashes = previous.get("rule_hashes") or {}
+    ids = [cr.rule["id"] for cr in queue]
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for f in previous.get("findings", []) or []:
+        groups.setdefault(str(f.get("rule_id", "")).split(":", 1)[0], []).append(f)
+    return {
+        cr.rule["id"]: groups.get(cr.rule["id"], [])
+        for cr in queue
+        if prev_hashes.get(cr.rule["id"]) == cr.digest
+        and ":" not in cr.rule["id"] and ids.count(cr.rule["id"]) == 1
+        and not any(f.get("status") in NONDETERMINISTIC_STATUSES
+                    for f in groups.get(cr.rule["id"], []))
+    }
 
-    # çalışacak kural setini topla
-    queue: List[Dict[str, Any]] = []
-    queue.extend(rules.get("common", []))
-    by_type = (rules.get("by_type") or {}).get(asset_type, [])
-    queue.extend(by_type)
+def _profile_summary(rows: List[Dict[str, Any]], t_sections: float,
+                     t_total: float) -> Dict[str, Any]:
+    """Kural satırlarını (en yavaş önce) ve tip bazında toplamları döner."""
+    by_type: Dict[str, Dict[str, Any]] = {}
+    for r in rows:
+        r["wall_ms"] = round(r["wall_ms"], 3)
+        agg = by_type.setdefault(r["type"], {"rules": 0, "wall_ms": 0.0, "scans": 0, "bytes": 0,
+                                             "cached_scans": 0, "cached_bytes": 0})
+        agg["rules"] += 1
+        agg["wall_ms"] += r["wall_ms"]
+        for k in ("scans", "bytes", "cached_scans", "cached_bytes"):
+            agg[k] += r[k]
+    for agg in by_type.values():
+        agg["wall_ms"] = round(agg["wall_ms"], 3)
+    return {
+        "total_ms": round(t_total * 1000, 3),
+        "sectioning_ms": round(t_sections * 1000, 3),
+        "by_rule": sorted(rows, key=lambda r: -r["wall_ms"]),
+        "by_type": dict(sorted(by_type.items(), key=lambda kv: -kv[1]["wall_ms"])),
+    }
 
-    findings: List[Dict[str, Any]] = []
+def _evaluate_rule(cr: CompiledRule, sections: SectionIndex,
+                   matcher: LiteralMatcher) -> List[Dict[str, Any]]:
+    # aynı bölüm demeti (metin + tarama) doküman başına bir kez kurulur
+    scan = sections.scan(_bundle_key(sections, cr.field), matcher)
+    try:
+        return cr.evaluate(cr.rule, scan)
+    except RegexTimeout as e:
+        # kuralın kısmi bulguları atılır; tek "timeout" bulgusu raporlanır
+        return [{"rule_id": cr.rule["id"], "status": "timeout",
+                 "title": cr.rule.get("title", cr.rule["id"]), "detail": str(e)}]
 
-    for r in queue:
-        r = dict(r)  # kopya
-        r.setdefault("id", r.get("title", "RULE").upper().replace(" ", "_"))
-        rtype = r.get("type")
-        field = r.get("field")
-        text = _concat_sections(text_by_section, field) if field else "\n\n".join(text_by_section.values())
-
-        if rtype == "required_fields":
-            findings.extend(eval_required_fields(r, text))
-        elif rtype == "nonempty_text":
-            findings.extend(eval_nonempty_text(r, text))
-        elif rtype == "coexist":
-            findings.extend(eval_coexist(r, text))
-        elif rtype in ("table_columns", "takidat_table"):
-            findings.extend(eval_table_columns(r, text))
-        elif rtype in ("list_min_count",):
-            findings.extend(eval_list_min_count(r, text))
-        elif rtype == "enum":
-            findings.extend(eval_enum(r, text))
-        elif rtype == "flags":
-            findings.extend(eval_flags(r, text, optional=False))
-        elif rtype == "flags_optional":
-            findings.extend(eval_flags(r, text, optional=True))
-        elif rtype == "date_triplet":
-            findings.extend(eval_date_triplet(r, text))
-        elif rtype == "attachments_check":
-            findings.extend(eval_attachments(r, text))
-        elif rtype == "quality_rules":
-            findings.extend(eval_quality_rules(r, text))
-        # Basit/kısmi destek (TODO ayrıntılandırılabilir)
-        elif rtype in ("separate_calc", "doc_triplet_match", "compare_required",
-                       "area_pair", "boolean_required", "composite_presence"):
-            findings.append({
-                "rule_id": r["id"],
-                "status": "present" if text.strip() else "missing",
-                "title": r["title"],
-                "detail": f"TYPE={rtype} (kısmi kontrol)",
-            })
-        else:
-            findings.append({
-                "rule_id": r["id"],
-                "status": "present",
-                "title": f"{r['title']} (desteklenmeyen type: {rtype})",
-            })
-
-    # özet
-    summary = {"present": 0, "missing": 0, "wrong": 0, "optional_absent": 0}
+def _summarize(findings: List[Dict[str, Any]], queue: List[CompiledRule]) -> Dict[str, Any]:
+    """Bulgulardan özet sayımlar + verdict; run_rules sonuç sözlüğünü kurar."""
+    summary = {"present": 0, "missing": 0, "wrong": 0, "optional_absent": 0, "timeout": 0}
     for f in findings:
         st = f["status"]
         if st in summary:
             summary[st] += 1
 
     verdict = "OK"
-    if summary["missing"] > 0 or summary["wrong"] > 0:
+    if summary["missing"] > 0 or summary["wrong"] > 0 or summary["timeout"] > 0:
         verdict = "EKSİK"
 
-    return {"verdict": verdict, "summary_counts": summary, "findings": findings}
+    return {"verdict": verdict, "summary_counts": summary, "findings": findings,
+            "rule_hashes": {cr.rule["id"]: cr.digest for cr in queue}}
+
+def run_rules(lines: List[Dict[str, Any]],
+              headings: List[Dict[str, Any]],
+              rules_path: str,
+              asset_type: str = "arsa",
+              plan: Optional[RulePlan] = None,
+              previous: Optional[Dict[str, Any]] = None,
+              profile: bool = False) -> Dict[str, Any]:
+    """
+    previous: aynı doküman + tür için daha önceki run_rules sonucu (rule_hashes
+    ile). Verilirse yalnız tanımı değişen/yeni kurallar değerlendirilir,
+    diğerlerinin bulguları aynen taşınır; sonuçta 'reevaluated' listesi olur.
+    profile: True ise sonuçta 'profile' (kural/tip başına süre, regex tarama
+    sayısı, taranan bayt) döner; bkz. _profile_summary.
+    """
+    plan = plan or load_rule_plan(rules_path)
+    queue = plan.queue(asset_type)
+    reuse = _reusable_findings(queue, previous) if previous else {}
+
+    # PDF metnini bölümlere ayır (her kural yeniden kullanılıyorsa hiç kurulmaz)
+    sections: Optional[SectionIndex] = None
+
+    findings: List[Dict[str, Any]] = []
+    reevaluated: List[str] = []
+    prof_rows: List[Dict[str, Any]] = []
+    t_start = time.perf_counter()
+    t_sections = 0.0
+
+    try:
+        for cr in queue:
+            if cr.rule["id"] in reuse:
+                findings.extend(reuse[cr.rule["id"]])
+                continue
+            if sections is None:
+                t0 = time.perf_counter()
+                sections = build_section_index(lines, headings)
+                t_sections = time.perf_counter() - t0
+            if profile:
+                _PROF.counter = _new_counter()
+                t0 = time.perf_counter()
+            produced = _evaluate_rule(cr, sections, plan.matcher)
+            if profile:
+                prof_rows.append({"rule_id": cr.rule["id"], "type": cr.rtype or "",
+                                  "wall_ms": (time.perf_counter() - t0) * 1000,
+                                  "scans": _PROF.counter[0], "bytes": _PROF.counter[1],
+                                  "cached_scans": _PROF.counter[2], "cached_bytes": _PROF.counter[3],
+                                  "findings": len(produced)})
+            findings.extend(produced)
+            reevaluated.append(cr.rule["id"])
+    finally:
+        _PROF.counter = None
+
+    out = _summarize(findings, queue)
+    if previous is not None:
+        out["reevaluated"] = reevaluated
+    if profile:
+        out["profile"] = _profile_summary(prof_rows, t_sections,
+                                          time.perf_counter() - t_start)
+    return out
+
+# ---------- Çoklu tür: tek geçiş + tür sıralaması ----------
+# Tür başına anahtar kelimeler (katlanmış, kelime sınırlı aranır);
+# kurallar.yaml metadata.asset_keywords ile genişletilebilir.
+ASSET_TYPE_KEYWORDS: Dict[str, List[str]] = {
+    "arsa": ["arsa", "imar parseli", "kaks", "taks", "hmax", "yola cephe", "parselasyon",
+             "ifraz", "tevhit", "emsal artışı"],
+    "tarla": ["tarla", "tarım arazisi", "sulu", "kuru", "toprak sınıfı", "ekili", "hasat",
+              "mutlak tarım", "5403", "arazi kullanım kabiliyeti"],
+    "konut": ["konut", "daire", "mesken", "kat mülkiyeti", "bağımsız bölüm", "iskan",
+              "oda", "salon", "site içi"],
+    "bina": ["bina", "yapı ruhsatı", "yapı sınıfı", "inşaat yılı", "kat adedi", "betonarme",
+             "yapı denetim"],
+    "ticari_tesis": ["işyeri", "dükkan", "mağaza", "ofis", "ticari", "depo", "fabrika",
+                     "kira geliri"],
+    "sera": ["sera", "cam sera", "plastik sera", "ısıtma", "havalandırma", "fide", "topraksız"],
+    "turistik_tesis": ["otel", "turizm", "pansiyon", "yatak kapasitesi", "turizm belgesi",
+                       "apart"],
+    "akaryakit": ["akaryakıt", "istasyon", "pompa", "epdk", "lpg", "yakıt tankı", "akaryakıt lisansı"],
+}
+
+# Kanonik başlık → hangi türlerin raporunda beklenir
+ASSET_TYPE_HEADINGS: Dict[str, List[str]] = {
+    "ruhsat": ["konut", "bina", "ticari_tesis", "turistik_tesis", "akaryakit", "sera"],
+    "imar": ["arsa", "konut", "bina", "ticari_tesis"],
+    "tarla_ozel": ["tarla"],
+}
+
+# Skor ağırlıkları: anahtar kelime, türe özel kural doluluğu, başlık
+RANK_WEIGHTS = (0.5, 0.3, 0.2)
+
+@lru_cache(maxsize=8)
+def _keyword_matcher(items: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> LiteralMatcher:
+    return LiteralMatcher([w for _, ws in items for w in ws])
+
+def rank_asset_types(sections: SectionIndex,
+                     headings: List[Dict[str, Any]],
+                     plan: RulePlan,
+                     results: Optional[Dict[str, Dict[str, Any]]] = None,
+                     asset_types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Dokümanın muhtemel taşınmaz türünü sıralar. Skor (0–1):
+      - anahtar kelime: türün kelimelerinden kaçı geçiyor (kapsama oranı)
+      - kural: türe özel kuralların 'present' oranı (results verilmişse)
+      - başlık: türle ilişkili kanonik başlıkların varlığı
+    """
+    types = list(asset_types or plan.by_type or ASSET_TYPE_KEYWORDS)
+    kw = {t: list(ASSET_TYPE_KEYWORDS.get(t, [])) for t in types}
+    for t, extra in ((plan.metadata or {}).get("asset_keywords") or {}).items():
+        if t in kw:
+            kw[t] += [str(w) for w in extra or []]
+    matcher = _keyword_matcher(tuple((t, tuple(ws)) for t, ws in sorted(kw.items())))
+    hits = matcher.scan(sections.buffer)
+
+    canon = {(h.get("canonical") or "").strip() for h in headings
+             if h.get("status") == "heading" and h.get("canonical")}
+    w_kw, w_rule, w_head = RANK_WEIGHTS
+
+    out = []
+    for t in types:
+        words = {_fold(w) for w in kw[t] if w.strip()}
+        found = {w: len(hits.get(w, [])) for w in words if w in hits}
+        kw_score = len(found) / len(words) if words else 0.0
+
+        rule_ratio = 0.0
+        own: List[Dict[str, Any]] = []
+        own_ids = {cr.rule["id"] for cr in plan.by_type.get(t, [])}
+        if results and t in results and own_ids:
+            # alt bulgular "ARSA_001:Ada" biçiminde; temel id ilk ':' öncesi
+            own = [f for f in results[t]["findings"]
+                   if str(f.get("rule_id", "")).split(":", 1)[0] in own_ids]
+            if own:
+                rule_ratio = sum(f["status"] == "present" for f in own) / len(own)
+
+        rel = [c for c, ts in ASSET_TYPE_HEADINGS.items() if t in ts]
+        head_score = sum(c in canon for c in rel) / len(rel) if rel else 0.0
+
+        out.append({
+            "asset_type": t,
+            "score": round(w_kw * kw_score + w_rule * rule_ratio + w_head * head_score, 4),
+            "keyword_hits": dict(sorted(found.items(), key=lambda kv: -kv[1])),
+            "rule_present_ratio": round(rule_ratio, 4),
+            "rule_findings": len(own),
+            "heading_hits": [c for c in rel if c in canon],
+        })
+    out.sort(key=lambda r: -r["score"])
+    return out
+
+def run_rules_all_types(lines: List[Dict[str, Any]],
+                        headings: List[Dict[str, Any]],
+                        rules_path: str,
+                        asset_types: Optional[List[str]] = None,
+                        plan: Optional[RulePlan] = None) -> Dict[str, Any]:
+    """
+    Bölümleme ve 'common' kuralları bir kez; her by_type kümesi aynı bölüm
+    index'i (ve tarama önbelleği) üzerinde değerlendirilir.
+    Dönüş: {"results": {tür: run_rules sonucu}, "ranking": [...], "best": tür}
+    """
+    plan = plan or load_rule_plan(rules_path)
+    types = list(asset_types or plan.by_type)
+    sections = build_section_index(lines, headings)
+
+    common: List[Dict[str, Any]] = []
+    for cr in plan.common:
+        common.extend(_evaluate_rule(cr, sections, plan.matcher))
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for t in types:
+        own: List[Dict[str, Any]] = []
+        for cr in plan.by_type.get(t, []):
+            own.extend(_evaluate_rule(cr, sections, plan.matcher))
+        # ortak bulgular her türün sonucuna kopya olarak girer
+        results[t] = _summarize([dict(f) for f in common] + own, plan.queue(t))
+
+    ranking = rank_asset_types(sections, headings, plan, results, types)
+    return {"results": results, "ranking": ranking,
+            "best": ranking[0]["asset_type"] if ranking else None}
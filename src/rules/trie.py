@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from typing import Any, Dict, Iterable
+import re
+
+def trie_regex(words: Iterable[str]) -> str:
+    """
+    Kelime listesini ortak önekleri birleştirilmiş tek alternasyona çevirir;
+    her konumda en uzun kelime önce denenir. Kural motorunun literal
+    eşleyicisi ve başlık varyant otomatı ortak kullanır.
+    """
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, Any]) -> str:
+        end = "" in node
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        if len(alts) == 1 and not end:
+            return alts[0]
+        body = "(?:" + "|".join(alts) + ")"
+        return body + "?" if end else body   # greedy: önce uzun token
+
+    return emit(trie)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from pathlib import Path
+import sys
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+BASE_DIR = SRC_DIR.parent
+DICT_PATH = BASE_DIR / "data" / "rules" / "headings_dict.yaml"
+RULES_PATH = BASE_DIR / "data" / "rules" / "kurallar.yaml"
+
+@pytest.fixture(scope="session")
+def synth_pdf(tmp_path_factory) -> Path:
+    """2 sayfalık sentetik rapor (bench.synth_report)."""
+    from bench.synth_report import generate_report
+    return generate_report(tmp_path_factory.mktemp("synth") / "synth_2p.pdf", pages=2, seed=0)
+
+@pytest.fixture(scope="session")
+def synth_doc(synth_pdf):
+    """(lines, headings) — sentetik rapor okunmuş ve başlıkları tespit edilmiş."""
+    from extract.pdf_reader import read_pdf_lines
+    from extract.heading_extractor import load_headings_dict, detect_headings
+    lines = read_pdf_lines(synth_pdf)
+    heads = detect_headings(lines, load_headings_dict(str(DICT_PATH)),
+                            strict_threshold=0.70, suspect_low=0.50)
+    return lines, heads
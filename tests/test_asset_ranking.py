@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from conftest import RULES_PATH
+from rules.rules_engine import load_rule_plan, run_rules, run_rules_all_types
+
+def test_all_types_match_single_type_runs(synth_doc):
+    lines, heads = synth_doc
+    plan = load_rule_plan(str(RULES_PATH))
+    multi = run_rules_all_types(lines, heads, str(RULES_PATH), plan=plan)
+    for t in plan.by_type:
+        single = run_rules(lines, heads, str(RULES_PATH), asset_type=t, plan=plan)
+        assert multi["results"][t]["findings"] == single["findings"]
+        assert multi["results"][t]["summary_counts"] == single["summary_counts"]
+
+def test_ranking_counts_every_own_finding(synth_doc):
+    lines, heads = synth_doc
+    plan = load_rule_plan(str(RULES_PATH))
+    multi = run_rules_all_types(lines, heads, str(RULES_PATH), plan=plan)
+    common_ids = {cr.rule["id"] for cr in plan.common}
+    for r in multi["ranking"]:
+        findings = multi["results"][r["asset_type"]]["findings"]
+        own = [f for f in findings if f["rule_id"].split(":", 1)[0] not in common_ids]
+        assert r["rule_findings"] == len(own)
+        assert 0.0 <= r["score"] <= 1.0
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import fitz
+
+from bench import run_bench
+from bench.synth_report import generate_report
+
+def test_synth_report_is_deterministic(tmp_path):
+    a = generate_report(tmp_path / "a.pdf", pages=2, seed=3)
+    b = generate_report(tmp_path / "b.pdf", pages=2, seed=3)
+    with fitz.open(a) as da, fitz.open(b) as db:
+        assert da.page_count == 2
+        assert [p.get_text() for p in da] == [p.get_text() for p in db]
+
+def test_bench_document_smoke(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_bench, "SYNTH_DIR", tmp_path)
+    res = run_bench.bench_document(2, seed=0, repeat=1)
+    assert set(res) == set(run_bench.STAGES)
+    assert all(ms >= 0 for ms in res.values())
+    assert (tmp_path / "synth_2p_s0.pdf").exists()
+
+def test_compare_flags_only_real_regressions():
+    base = {"2": {"run_rules": 10.0, "save_bundle": 10.0, "read_pdf_lines": 1.0}}
+    cur = {"2": {"run_rules": 30.0, "save_bundle": 11.0, "read_pdf_lines": 3.0, "new_stage": 5.0}}
+    rows = {r["stage"]: r for r in run_bench.compare(cur, base, threshold=0.25, min_ms=5.0)}
+    assert set(rows) == {"run_rules", "save_bundle", "read_pdf_lines"}
+    assert rows["run_rules"]["regressed"]
+    assert not rows["save_bundle"]["regressed"]      # oran eşiğin altında
+    assert not rows["read_pdf_lines"]["regressed"]   # mutlak fark min_ms altında
+
+def test_main_saves_and_compares_baseline(tmp_path, monkeypatch):
+    monkeypatch.setattr(run_bench, "SYNTH_DIR", tmp_path)
+    baseline = tmp_path / "baseline.json"
+    args = ["--pages", "2", "--repeat", "1", "--baseline", str(baseline)]
+    assert run_bench.main(args + ["--save-baseline"]) == 0
+    assert baseline.exists()
+    assert run_bench.main(args + ["--threshold", "100"]) == 0
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""generate_commentary_batch'i yerel bir stdlib HTTP sunucusuna (Ollama taklidi) karşı dener."""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+import pytest
+
+from report import commentary_llm
+from report.commentary_llm import OllamaHealth, generate_commentary_batch
+from report.llm_cache import ResponseCache
+
+class _Stub(BaseHTTPRequestHandler):
+    delay = 0.15
+    lock = threading.Lock()
+    inflight = 0
+    max_inflight = 0
+    generate_calls = 0
+    tags_calls = 0
+
+    def log_message(self, *args):  # test çıktısını kirletmesin
+        pass
+
+    def _send(self, code: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            type(self).tags_calls += 1
+            self._send(200, {"models": [{"name": "stub-model"}]})
+        else:
+            self._send(404, {})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        cls = type(self)
+        with cls.lock:
+            cls.generate_calls += 1
+            cls.inflight += 1
+            cls.max_inflight = max(cls.max_inflight, cls.inflight)
+        try:
+            time.sleep(cls.delay)
+            if "Tür: hata" in payload["prompt"]:
+                self._send(500, {"error": "boom"})
+            else:
+                self._send(200, {"response": f"yorum ({payload['model']})", "done": True})
+        finally:
+            with cls.lock:
+                cls.inflight -= 1
+
+@pytest.fixture
+def stub_url(monkeypatch, tmp_path):
+    handler = type("Handler", (_Stub,), {"lock": threading.Lock()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("ENABLE_LLM", "1")
+    monkeypatch.setenv("LLM_CACHE", "1")
+    monkeypatch.setenv("OLLAMA_MODEL", "stub-model")
+    monkeypatch.setattr(commentary_llm, "RESPONSE_CACHE", ResponseCache(cache_dir=tmp_path / "llm"))
+    monkeypatch.setattr(commentary_llm, "HEALTH", OllamaHealth())
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/generate", handler
+    server.shutdown()
+    server.server_close()
+
+def _items(types):
+    return [(t, {"verdict": "EKSİK", "summary_counts": {"missing": 1}, "findings": []}) for t in types]
+
+def test_concurrency_is_bounded_and_order_kept(stub_url):
+    url, stub = stub_url
+    types = [f"tur{i}" for i in range(6)]
+    out = generate_commentary_batch(_items(types), concurrency=3, url=url)
+    assert [r["asset_type"] for r in out] == types
+    assert all(r["text"] == "yorum (stub-model)" and "error" not in r for r in out)
+    assert stub.max_inflight == 3
+    assert stub.tags_calls == 1  # model yoklaması url'in sunucusuna gider
+
+def test_second_batch_is_served_from_cache(stub_url):
+    url, stub = stub_url
+    items = _items(["arsa", "tarla"])
+    generate_commentary_batch(items, concurrency=2, url=url)
+    calls = stub.generate_calls
+    again = generate_commentary_batch(items, concurrency=2, url=url)
+    assert all(r["cached"] for r in again)
+    assert stub.generate_calls == calls
+
+def test_server_error_is_reported_per_item(stub_url):
+    url, stub = stub_url
+    out = generate_commentary_batch(_items(["arsa", "hata"]), concurrency=2, url=url)
+    ok, bad = out
+    assert ok["text"] and "error" not in ok
+    assert bad["text"] == "" and "500" in bad["error"]
+    assert not bad["cached"]
+
+def test_batch_pass_attaches_commentary_to_saved_reports(stub_url, tmp_path, monkeypatch):
+    import io
+    import openpyxl
+    import app
+    from conftest import RULES_PATH
+    from report.report_writer import save_bundle
+    url, stub = stub_url
+    monkeypatch.setattr(app, "ENABLE_LLM", True)
+    monkeypatch.setattr(app, "generate_commentary_batch",
+                        lambda items: generate_commentary_batch(items, url=url))
+    recs = []
+    for t in ["arsa", "hata", "tarla"]:
+        paths = save_bundle(_items([t])[0][1], rules_path=str(RULES_PATH),
+                            out_dir=str(tmp_path / "out"), base_name=f"doc_{t}")
+        recs.append({"file": f"doc_{t}.pdf", "asset_type": t, "paths": paths})
+    recs.append({"file": "bozuk.pdf", "asset_type": "arsa", "error": "X"})
+    idx = io.StringIO()
+    app._commentary_pass(recs, idx)
+    written = [json.loads(ln) for ln in idx.getvalue().splitlines()]
+    assert [r["asset_type"] for r in written] == ["arsa", "tarla"]  # hata/bozuk yeniden yazılmaz
+    assert stub.generate_calls == 3
+    for r in written:
+        md = r["paths"]["commentary_md"]
+        assert md == r["paths"]["json"][:-len(".json")] + "_commentary.md"
+        assert open(md, encoding="utf-8").read().strip() == "yorum (stub-model)"
+        assert "Commentary" in openpyxl.load_workbook(r["paths"]["excel"]).sheetnames
+    assert "commentary_md" not in recs[1]["paths"]
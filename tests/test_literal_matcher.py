@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""trie_regex / LiteralMatcher ile eski token başına kelime sınırlı aramanın denkliği."""
+import random
+import re
+
+from rules.rules_engine import LiteralMatcher, _fold
+from rules.trie import trie_regex
+
+ALPHABET = "aiıİIbşŞ -"
+
+def _rand(rnd, n):
+    return "".join(rnd.choice(ALPHABET) for _ in range(n))
+
+# ---------- trie_regex ----------
+def test_trie_regex_matches_the_same_words_as_plain_alternation():
+    rnd = random.Random(0)
+    for _ in range(200):
+        words = sorted({_rand(rnd, rnd.randint(1, 4)) for _ in range(rnd.randint(1, 6))})
+        trie = re.compile(f"(?:{trie_regex(words)})\\Z")
+        plain = re.compile("(?:" + "|".join(map(re.escape, words)) + ")\\Z")
+        for _ in range(20):
+            s = _rand(rnd, rnd.randint(0, 4))
+            assert bool(trie.match(s)) == bool(plain.match(s)), (words, s)
+
+# ---------- LiteralMatcher (eski: token başına \b…\b araması) ----------
+def _old_scan(words, text):
+    folded = _fold(text)
+    out = {}
+    for w in {_fold(w) for w in words if w and w.strip()}:
+        ps = [m.start() for m in re.finditer(rf"(?=\b{re.escape(w)}\b)", folded)]
+        if ps:
+            out[w] = ps
+    return out
+
+FIXED = [
+    (["imar", "İMAR DURUMU"], "İMAR DURUMU ve imar planı"),      # İ → i katlama
+    (["ışık", "IŞIK"], "Işık ve ISIK ve ışıklı"),                  # ı/I katlama, kelime sınırı
+    (["yevmiye", "yevmiye no", "no"], "Yevmiye No: 123, no"),      # lookahead altında iç içe
+    (["a b", "b", "b c"], "a b c"),                                # çakışan eşleşmeler
+    (["", "  "], "herhangi bir metin"),                            # boş token
+]
+
+def test_literal_matcher_fixed_cases():
+    for words, text in FIXED:
+        assert LiteralMatcher(words).scan(text) == _old_scan(words, text), (words, text)
+    assert LiteralMatcher(["", " "]).scan("x") == {}
+
+def test_literal_matcher_random_cases():
+    rnd = random.Random(1)
+    for _ in range(300):
+        words = [_rand(rnd, rnd.randint(1, 5)) for _ in range(rnd.randint(1, 6))]
+        text = _rand(rnd, rnd.randint(0, 40))
+        assert LiteralMatcher(words).scan(text) == _old_scan(words, text), (words, text)
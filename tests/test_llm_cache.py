@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from pathlib import Path
+
+from report import llm_cache
+from report.llm_cache import ResponseCache
+
+def _count_scans(monkeypatch):
+    calls = []
+    orig = Path.glob
+    monkeypatch.setattr(Path, "glob", lambda self, pat: (calls.append(pat), orig(self, pat))[1])
+    return calls
+
+def test_put_does_not_rescan_the_directory(tmp_path, monkeypatch):
+    cache = ResponseCache(cache_dir=tmp_path, max_entries=1000)
+    scans = _count_scans(monkeypatch)
+    for i in range(100):
+        cache.put(f"k{i}", f"yanıt {i}")
+    assert len(scans) == 1          # yalnız ilk yazımda sayaçlar için
+    assert cache.get("k5") == "yanıt 5"
+
+def test_entry_limit_evicts_oldest_to_low_water(tmp_path, monkeypatch):
+    cache = ResponseCache(cache_dir=tmp_path, max_entries=20)
+    scans = _count_scans(monkeypatch)
+    for i in range(60):
+        cache.put(f"k{i}", "x" * 10)
+    files = list(tmp_path.glob("*.json"))
+    assert len(files) <= 20
+    assert cache.get("k59") == "x" * 10 and cache.get("k0") is None
+    assert len(scans) < 20          # her yazımda değil, eşik aşımında tarar
+    assert cache.stats()["evictions"] == 60 - len(files)
+
+def test_byte_limit_and_overwrite_are_tracked(tmp_path):
+    cache = ResponseCache(cache_dir=tmp_path, max_bytes=2000, max_entries=1000)
+    for _ in range(50):
+        cache.put("same", "y" * 100)            # üzerine yazma adedi artırmaz
+    assert len(list(tmp_path.glob("*.json"))) == 1
+    for i in range(40):
+        cache.put(f"k{i}", "z" * 100)
+    assert sum(p.stat().st_size for p in tmp_path.glob("*.json")) <= 2000
+
+def test_periodic_rescan_sees_other_writers(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_RESCAN_EVERY", 5)
+    a = ResponseCache(cache_dir=tmp_path, max_entries=10)
+    b = ResponseCache(cache_dir=tmp_path, max_entries=10)
+    for i in range(30):
+        (a if i % 2 else b).put(f"k{i}", "v")
+    assert len(list(tmp_path.glob("*.json"))) <= 10
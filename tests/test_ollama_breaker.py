@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from report import commentary_llm
+from report.commentary_llm import OllamaHealth
+
+def _opened(monkeypatch) -> OllamaHealth:
+    monkeypatch.setattr(commentary_llm, "BREAKER_BACKOFF", 0.05)
+    h = OllamaHealth()
+    for _ in range(commentary_llm.BREAKER_THRESHOLD):
+        h.record_failure()
+    assert not h.allow()
+    time.sleep(0.06)
+    return h
+
+def test_half_open_lets_one_trial_through(monkeypatch):
+    h = _opened(monkeypatch)
+    allowed = []
+    barrier = threading.Barrier(8)
+
+    def probe():
+        barrier.wait()
+        allowed.append(h.allow())
+
+    threads = [threading.Thread(target=probe) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert allowed.count(True) == 1
+    assert h.state()["trial_in_flight"]
+
+    h.record_success()
+    assert h.allow() and h.allow()
+
+def test_failed_trial_reopens_with_longer_backoff(monkeypatch):
+    h = _opened(monkeypatch)
+    assert h.allow()
+    h.record_failure()
+    assert not h.allow()
+    assert h.state()["backoff_s"] == 0.1
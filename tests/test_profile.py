@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from conftest import RULES_PATH
+from rules.rules_engine import load_rule_plan, run_rules
+
+def test_profile_separates_first_touch_and_cached_scans(synth_doc):
+    lines, heads = synth_doc
+    plan = load_rule_plan(str(RULES_PATH))
+    plain = run_rules(lines, heads, str(RULES_PATH), asset_type="arsa", plan=plan)
+    res = run_rules(lines, heads, str(RULES_PATH), asset_type="arsa", plan=plan, profile=True)
+    assert res["findings"] == plain["findings"]
+    rows = res["profile"]["by_rule"]
+    assert {r["rule_id"] for r in rows} == {cr.rule["id"] for cr in plan.queue("arsa")}
+    # aynı bölümü okuyan sonraki kurallar önbellekten okuduklarını raporlar
+    assert sum(r["cached_scans"] for r in rows) > 0
+    by_type = res["profile"]["by_type"]
+    assert sum(v["cached_scans"] for v in by_type.values()) == sum(r["cached_scans"] for r in rows)
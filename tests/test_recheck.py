@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+import copy
+
+from conftest import RULES_PATH
+from rules.rules_engine import load_rule_plan, run_rules
+
+def test_unchanged_rules_are_reused(synth_doc):
+    lines, heads = synth_doc
+    plan = load_rule_plan(str(RULES_PATH))
+    full = run_rules(lines, heads, str(RULES_PATH), asset_type="arsa", plan=plan)
+    again = run_rules(lines, heads, str(RULES_PATH), asset_type="arsa", plan=plan, previous=full)
+    assert again["reevaluated"] == []
+    assert again["findings"] == full["findings"]
+
+def test_timed_out_rules_are_retried(synth_doc):
+    lines, heads = synth_doc
+    plan = load_rule_plan(str(RULES_PATH))
+    full = run_rules(lines, heads, str(RULES_PATH), asset_type="arsa", plan=plan)
+    previous = copy.deepcopy(full)
+    rid = previous["findings"][0]["rule_id"].split(":", 1)[0]
+    for f in previous["findings"]:
+        if f["rule_id"].split(":", 1)[0] == rid:
+            f["status"] = "timeout"
+    again = run_rules(lines, heads, str(RULES_PATH), asset_type="arsa", plan=plan, previous=previous)
+    assert rid in again["reevaluated"]
+    assert again["findings"] == full["findings"]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from rules import rules_engine
+from rules.rules_engine import RegexTimeout, regex_risk
+
+RISKY = r"(a+)+$"
+SAFE_RISKY = r"(b+)+c"  # işaretlenir ama hızlı biter
+
+@pytest.fixture
+def no_regex_pkg(monkeypatch):
+    monkeypatch.setattr(rules_engine, "_regex", None)
+    monkeypatch.setattr(rules_engine, "REGEX_BUDGET_MS", 300)
+    worker = rules_engine._RegexWorker()
+    monkeypatch.setattr(rules_engine, "_REGEX_WORKER", worker)
+    yield worker
+    worker.close()
+
+def test_patterns_are_flagged():
+    assert regex_risk(RISKY) and regex_risk(SAFE_RISKY)
+    assert regex_risk(r"\d+ m2") is None
+
+def test_flagged_matches_reuse_one_worker(no_regex_pkg):
+    spans = rules_engine._user_spans(SAFE_RISKY, "bbc x bc")
+    pid = no_regex_pkg._proc.pid
+    for _ in range(5):
+        assert rules_engine._user_spans(SAFE_RISKY, "bbc x bc") == spans == [(0, 3), (6, 8)]
+    assert rules_engine._user_spans(SAFE_RISKY, "xbbc", first_only=True) == [(1, 4)]
+    assert no_regex_pkg._proc.pid == pid
+
+def test_timeout_kills_worker_and_next_call_respawns(no_regex_pkg):
+    rules_engine._user_spans(SAFE_RISKY, "bc")
+    old = no_regex_pkg._proc
+    with pytest.raises(RegexTimeout):
+        rules_engine._user_spans(RISKY, "a" * 40 + "!")
+    assert not old.is_alive() and no_regex_pkg._proc is None
+    assert rules_engine._user_spans(SAFE_RISKY, "bc") == [(0, 2)]
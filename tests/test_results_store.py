@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+
+from report import results_store
+from report.results_store import ResultsStore
+
+RESULT = {
+    "verdict": "EKSİK",
+    "summary_counts": {"present": 1, "missing": 1, "wrong": 0, "optional_absent": 0, "timeout": 1},
+    "findings": [
+        {"rule_id": "ARSA_002:KAKS", "status": "missing", "title": "İmar lejantı → KAKS"},
+        {"rule_id": "ARSA_002:TAKS", "status": "present", "title": "İmar lejantı → TAKS"},
+        {"rule_id": "ARSA_009", "status": "timeout", "title": "Özel desen"},
+    ],
+}
+
+def test_sub_findings_aggregate_under_base_rule(tmp_path):
+    store = ResultsStore(str(tmp_path / "r.sqlite"))
+    store.append(RESULT, "arsa", "h1")
+    rows = {r["base_rule_id"]: r for r in store.failure_rates()}
+    assert set(rows) == {"ARSA_002", "ARSA_009"}
+    assert rows["ARSA_002"]["title"] == "İmar lejantı"
+    assert (rows["ARSA_002"]["evaluated"], rows["ARSA_002"]["failed"]) == (2, 1)
+
+def test_timeouts_are_counted(tmp_path):
+    db = tmp_path / "r.sqlite"
+    store = ResultsStore(str(db))
+    store.append(RESULT, "arsa", "h1")
+    rows = {r["base_rule_id"]: r for r in store.failure_rates()}
+    assert rows["ARSA_009"]["failed"] == 1 and rows["ARSA_009"]["timeouts"] == 1
+    assert store.trend()[0]["timeouts"] == 1
+    with sqlite3.connect(db) as con:
+        assert con.execute("SELECT timeout FROM documents").fetchone()[0] == 1
+
+def test_append_result_reuses_one_store_per_path(tmp_path, monkeypatch):
+    db = str(tmp_path / "r.sqlite")
+    built = []
+    orig = results_store.ResultsStore.__init__
+    monkeypatch.setattr(results_store.ResultsStore, "__init__",
+                        lambda self, path: (built.append(path), orig(self, path))[1])
+    results_store.append_result(db, RESULT, "arsa", "h1")
+    results_store.append_result(db, RESULT, "arsa", "h2")
+    assert len(built) == 1
+    assert len(results_store.store_for(db).failure_rates()) == 2
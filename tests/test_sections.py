@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from extract.heading_extractor import detect_headings
+from rules.rules_engine import group_text_by_canonical
+
+def _line(text, bold=False, size=10.0):
+    return {"page": 1, "text": text, "font": "Helvetica-Bold" if bold else "Helvetica",
+            "size": size, "flags": 16 if bold else 0, "bbox": (0, 0, 1, 1)}
+
+LINES = [
+    _line("Tapu Bilgileri", bold=True, size=13),
+    _line("ada 101 parsel 5"),
+    _line("Imar Durumu", bold=True, size=13),
+    _line("KAKS 1.20"),
+    _line("Tapu Bilgileri", bold=True, size=13),
+    _line("ipotek 12.03.2021"),
+]
+
+def test_duplicate_headings_on_one_page_get_separate_sections():
+    heads = [
+        {"page": 1, "line": 0, "text": "Tapu Bilgileri", "canonical": "tapu", "status": "heading"},
+        {"page": 1, "line": 2, "text": "Imar Durumu", "canonical": "imar", "status": "heading"},
+        {"page": 1, "line": 4, "text": "Tapu Bilgileri", "canonical": "tapu", "status": "heading"},
+    ]
+    sections = group_text_by_canonical(LINES, heads)
+    assert sections["tapu"] == "ada 101 parsel 5\n\nipotek 12.03.2021"
+    assert sections["imar"] == "KAKS 1.20"   # ikinci başlık imar bölümüne karışmaz
+
+def test_headings_without_line_fall_back_to_first_text_match():
+    heads = [
+        {"page": 1, "text": "Tapu Bilgileri", "canonical": "tapu", "status": "heading"},
+        {"page": 1, "text": "Imar Durumu", "canonical": "imar", "status": "heading"},
+        {"page": 1, "text": "Tapu Bilgileri", "canonical": "tapu", "status": "heading"},
+    ]
+    sections = group_text_by_canonical(LINES, heads)
+    assert sections["tapu"] == "ada 101 parsel 5"
+    assert sections["imar"] == "KAKS 1.20\nTapu Bilgileri\nipotek 12.03.2021"
+
+def test_detect_headings_records_line_of_each_duplicate():
+    from conftest import DICT_PATH
+    from extract.heading_extractor import load_headings_dict
+    heads = detect_headings(LINES, load_headings_dict(str(DICT_PATH)),
+                            strict_threshold=0.70, suspect_low=0.50)
+    tapu = [h["line"] for h in heads if h.get("canonical") == "tapu"]
+    assert tapu == [0, 4]
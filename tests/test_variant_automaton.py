@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""VariantAutomaton.hit_matrix ile eski varyant başına alt dize sayımının denkliği."""
+import random
+
+import numpy as np
+
+from extract.heading_extractor import VariantAutomaton
+
+ALPHABET = "aiıİIbşŞ -"
+
+def _rand(rnd, n):
+    return "".join(rnd.choice(ALPHABET) for _ in range(n))
+
+# ---------- VariantAutomaton (eski: _keyword_match_score alt dize sayımı) ----------
+def _old_hits(items, texts_lc):
+    return np.array([[sum(1 for v in vs if v.lower() in t) for _, vs in items] for t in texts_lc],
+                    dtype=np.int32).reshape(len(texts_lc), len(items))
+
+def _check(items, texts):
+    texts_lc = [t.lower() for t in texts]
+    got = VariantAutomaton(items).hit_matrix(texts_lc)
+    assert np.array_equal(got, _old_hits(items, texts_lc)), (items, texts)
+
+def test_variant_automaton_fixed_cases():
+    items = (
+        ("tapu", ("tapu bilgileri", "tapu", "İpotek")),
+        ("imar", ("imar durumu", "İMAR", "imar")),         # aynı varyant iki kez listelenmiş
+        ("bos", ("", "x")),                                 # boş varyant her satırda geçer
+        ("ic", ("bilgi", "bilgileri")),                      # iç içe varyantlar
+    )
+    _check(items, ["TAPU BİLGİLERİ", "İmar Durumu", "ipotek şerhi", "", "bilgileri bilgi"])
+    _check((("a", ("",)),), ["", "x"])
+    _check((), ["x"])
+    _check(items, [])
+
+def test_variant_automaton_random_cases():
+    rnd = random.Random(2)
+    for _ in range(200):
+        items = tuple((f"k{i}", tuple(_rand(rnd, rnd.randint(0, 4)) for _ in range(rnd.randint(1, 4))))
+                      for i in range(rnd.randint(1, 4)))
+        _check(items, [_rand(rnd, rnd.randint(0, 30)) for _ in range(rnd.randint(1, 5))])